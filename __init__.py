@@ -7,11 +7,15 @@ from flask import request, session, jsonify
 from flask_mail import Mail
 #from backend.routes.profile import profile_bp
 
+from .api.dbmonitor import monitor as db_monitor
+
 mail = Mail()
-mongo = pymongo.MongoClient(host='mongo:27017')
+# db_monitor: per-request command counts + slow-command log (api/dbmonitor.py)
+mongo = pymongo.MongoClient(host='mongo:27017', event_listeners=[db_monitor])
 db = mongo.mydb
 
-def create_app():
+def create_app(config=None):
+    """config: optional overrides applied after the defaults below (e.g. by benchmarks/)."""
 
     print("Flask is running!")
 
@@ -29,9 +33,44 @@ def create_app():
     app.config['MAIL_USE_SSL'] = False
     app.config['MAIL_USERNAME'] = 'admin'
     app.config['MAIL_PASSWORD'] = 'admin'
+    app.config['MAIL_POOL_SIZE'] = 3  # open SMTP sessions reused across sends (api/mailer.py)
+    app.config['MAIL_TIMEOUT'] = 30   # SMTP socket timeout in seconds
+    app.config['EMAIL_OUTBOX_WORKERS'] = 2  # background SMTP delivery threads (0 = run `flask outbox work`)
+
+    app.config['BCRYPT_ROUNDS'] = 12         # cost for new hashes; older costs are rehashed on login
+    app.config['PASSWORD_WORKERS'] = 4       # bcrypt threads (bcrypt releases the GIL)
+    app.config['PASSWORD_QUEUE_DEPTH'] = 16  # beyond workers + depth → 503 Retry-After
+
+    app.config['INDEXES_ENSURE_ON_STARTUP'] = True
+    app.config['INDEXES_FAIL_FAST'] = True  # answer 503 on index drift (api/indexes.py)
+    app.config['TIMEFIELDS_BACKFILL_ON_STARTUP'] = True  # start_iso/end_iso → start_at/end_at (api/timefields.py)
+    app.config['DEPARTMENTS_MIGRATE_ON_STARTUP'] = True   # legacy departments shapes → flat array (api/departments.py)
+    app.config['SEARCH_BACKFILL_ON_STARTUP'] = True       # search_terms for older pub_req rows (api/search.py)
+    app.config['SIGNUPS_MIGRATE_ON_STARTUP'] = True       # users.signups arrays → signups collection (api/signups.py)
+
+    app.config['DB_SLOW_MS'] = 100           # log mongo commands slower than this (api/dbmonitor.py)
+    app.config['DB_EXPLAIN_SLOW'] = True     # ...with a queryPlanner summary
+    app.config['DB_QUERY_HEADERS'] = DEBUG   # X-DB-Queries / X-DB-Time response headers
+
+    app.config['PROFILER_ENABLED'] = False     # api/profiler.py; profiles go to /api/admin/profiles
+    app.config['PROFILER_MODE'] = 'sampler'    # 'sampler' (collapsed stacks) | 'cprofile' (pstats)
+    app.config['PROFILER_SAMPLE_RATE'] = 0.0   # fraction of all requests; admins can also send X-Profile: 1
+
+    # asyncio serving mode (asgi.py, api/asyncread.py); unused under the plain WSGI server
+    app.config['ASYNC_MONGO_URI'] = 'mongodb://mongo:27017'
+    app.config['ASYNC_REDIS_URL'] = 'redis://redis:6379/0'
+    app.config['ASYNC_WSGI_THREADS'] = 16    # threads running the Flask app for all other routes
+
+    if config:
+        app.config.update(config)
 
     mail.init_app(app)
 
+    # request timing / status / size metrics at GET /metrics; registered before the role guard
+    from .api import dbmonitor, metrics
+    metrics.init_app(app)
+    dbmonitor.init_app(app, mongo)
+
     @app.route("/ping")
     def ping():
         return "pong", 200
@@ -44,7 +83,7 @@ def create_app():
 
     # --- BEGIN: role guard (authoritative; minimal intrusion) ---
     PROTECTED_PREFIXES = {"student", "staff", "admin"}
-    SKIP_PREFIXES = {"api", "auth", "req", "users", "ping", "static", ""}
+    SKIP_PREFIXES = {"api", "auth", "req", "users", "ping", "metrics", "static", ""}
 
     def _normalize_role(user_type: str) -> str:
         t = (user_type or "").lower()
@@ -97,6 +136,17 @@ def create_app():
     from .api.profile import profile_bp
     app.register_blueprint(profile_bp)
 
+    from .api import departments, email_templates, indexes, outbox, passwords, profiler, search, signups, timefields
+    passwords.init_app(app)
+    indexes.init_app(app)
+    email_templates.init_app(app)
+    search.init_app(app)
+    outbox.init_app(app)
+    signups.init_app(app)
+    timefields.init_app(app)
+    departments.init_app(app)
+    profiler.init_app(app)
+
     with app.app_context():
         ensure_admin_exists()
     # END Api routes
@@ -0,0 +1,344 @@
+# backend/api/asyncread.py
+"""
+Asyncio serving mode for the public read endpoints.
+
+create_asgi_app(flask_app) returns an ASGI application (run it with
+`uvicorn backend.asgi:app`) that serves
+  GET/HEAD /api/req/calendar, /api/req/eventfetch      (window cache + headcounts)
+  GET/HEAD /api/req/attachments/<file_id>              (GridFS stream, Range / 304)
+as coroutines on PyMongo's async client and redis.asyncio. A slow client or a
+slow Mongo / GridFS read then holds a coroutine rather than a worker thread.
+
+Every other request, including all writes, runs the Flask app unchanged on a
+pool of ASYNC_WSGI_THREADS threads, each request on one thread from start to
+end of its (possibly streamed) body. asgiref's WsgiToAsgi is not used because
+it runs every WSGI call on a single shared thread.
+
+Routing uses the Flask url_map, and the response helpers are shared with
+api/req.py, so both paths answer the same. Async requests are recorded in the
+Flask /metrics registry and get the same CORS headers. They get no X-DB-* or
+X-Profile-Id headers; those hooks are per-thread.
+
+Needs pymongo>=4.13 (AsyncMongoClient / AsyncGridFSBucket); only asgi.py imports it.
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+import redis.asyncio as aioredis
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs import AsyncGridFSBucket
+from gridfs.errors import NoFile
+from pymongo import AsyncMongoClient
+from werkzeug.exceptions import HTTPException, InternalServerError
+from werkzeug.wrappers import Request
+
+from .. import db
+from . import calcache, req, signups
+
+DEFAULT_MONGO_URI = "mongodb://mongo:27017"
+DEFAULT_REDIS_URL = "redis://redis:6379/0"
+DEFAULT_WSGI_THREADS = 16
+BODY_SPOOL_BYTES = 1024 * 1024    # request bodies above this spill to a temp file
+STREAM_QUEUE_DEPTH = 8            # WSGI body chunks buffered ahead of a slow client
+
+# -----------------------
+# ASGI <-> WSGI plumbing
+# -----------------------
+
+def _environ(scope, body=None) -> dict:
+    """Minimal WSGI environ for an ASGI http scope."""
+    root = scope.get("root_path", "")
+    path = scope["path"]
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root,
+        "PATH_INFO": path[len(root):] if root and path.startswith(root) else path,
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,   # Flask's default log handler writes here
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = "HTTP_" + key
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def _asgi_headers(headers) -> list:
+    return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+async def _read_body(receive):
+    """The whole request body (spooled to disk when large) and its length."""
+    body, size = SpooledTemporaryFile(max_size=BODY_SPOOL_BYTES), 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        body.write(chunk)
+        size += len(chunk)
+        if not message.get("more_body"):
+            break
+    body.seek(0)
+    return body, size
+
+
+class AsyncReadApp:
+    def __init__(self, flask_app, database=None, redis_client=None):
+        self.flask_app = flask_app
+        self.metrics = flask_app.extensions.get("metrics")
+        self._urls = flask_app.url_map.bind("localhost")
+        self._pool = ThreadPoolExecutor(
+            max_workers=int(flask_app.config.get("ASYNC_WSGI_THREADS", DEFAULT_WSGI_THREADS)),
+            thread_name_prefix="wsgi",
+        )
+        self._db = database
+        self._redis = redis_client
+        self._mongo = None
+        self.handlers = {
+            "req.calendar_range": self.calendar,
+            "req.event_fetch": self.calendar,
+            "req.get_attachment": self.attachment,
+        }
+
+    # --- clients (created on the serving loop) ---
+
+    @property
+    def database(self):
+        if self._db is None:
+            self._mongo = AsyncMongoClient(self.flask_app.config.get("ASYNC_MONGO_URI", DEFAULT_MONGO_URI))
+            self._db = self._mongo[db.name]
+        return self._db
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = aioredis.Redis.from_url(self.flask_app.config.get("ASYNC_REDIS_URL", DEFAULT_REDIS_URL))
+        return self._redis
+
+    async def close(self):
+        if self._mongo is not None:
+            await self._mongo.close()
+        if self._redis is not None:
+            await self._redis.aclose()
+        self._pool.shutdown(wait=False)
+
+    # --- ASGI entry ---
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        if scope["method"] in ("GET", "HEAD"):
+            path, root = scope["path"], scope.get("root_path", "")
+            try:
+                rule, args = self._urls.match(path[len(root):] if root and path.startswith(root) else path, method=scope["method"], return_rule=True)
+            except HTTPException:
+                rule = None
+            handler = self.handlers.get(rule.endpoint) if rule is not None else None
+            if handler is not None:
+                return await self._serve(handler, rule.rule, args, scope, send)
+        await self._wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # --- async routes ---
+
+    async def _serve(self, handler, rule, args, scope, send):
+        environ = _environ(scope)
+        key = (scope["method"], rule)
+        if self.metrics is not None:
+            self.metrics.start(key)
+        t0, status, sent = time.perf_counter(), 500, None
+        try:
+            try:
+                rv, body = await handler(Request(environ), **args)
+            except HTTPException as e:
+                rv, body = e.get_response(environ), None
+            except Exception:
+                self.flask_app.logger.exception("async %s %s failed", scope["method"], scope["path"])
+                rv, body = InternalServerError().get_response(environ), None
+            status = rv.status_code
+            if "HTTP_ORIGIN" in environ:   # as CORS(app, supports_credentials=True) in create_app
+                rv.headers["Access-Control-Allow-Origin"] = environ["HTTP_ORIGIN"]
+                rv.headers["Access-Control-Allow-Credentials"] = "true"
+                rv.vary.add("Origin")
+            await send({"type": "http.response.start", "status": status,
+                        "headers": _asgi_headers(rv.headers.items())})
+            if body is None or scope["method"] == "HEAD":
+                data = b"" if scope["method"] == "HEAD" else rv.get_data()
+                sent = len(data)
+                await send({"type": "http.response.body", "body": data})
+            else:
+                sent = 0
+                async for chunk in body:
+                    sent += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            if self.metrics is not None:
+                self.metrics.finish(key, status, time.perf_counter() - t0, None, sent)
+
+    def _json(self, payload, status=200):
+        rv = self.flask_app.json.response(payload)
+        rv.status_code = status
+        return rv
+
+    async def calendar(self, request):
+        """Async twin of req._calendar_response()."""
+        s_iso, e_iso, err = req._parse_window(request.args)
+        if err:
+            return self._json(*err), None
+        window = calcache.cache_window(s_iso, e_iso)
+        if window is None:
+            cached = req._calendar_cache_value(await self._calendar_items(s_iso, e_iso))
+        else:
+            cached = await calcache.get_async(self.redis, *window)
+            if cached is None:
+                gen = await calcache.generation_async(self.redis)
+                cached = req._calendar_cache_value(await self._calendar_items(*window))
+                await calcache.put_async(self.redis, *window, cached, gen)
+            cached = req._calendar_slice(cached, window, s_iso, e_iso)
+
+        counts = await signups.headcounts_async(self.database, req._calendar_cached_ids(cached))
+        rv = self.flask_app.response_class(req._calendar_body(cached, counts), mimetype="application/json")
+        return rv, None
+
+    async def _calendar_items(self, s_iso, e_iso):
+        # range_filter() may read db.migrations (once a minute until the backfill is done)
+        filt = await asyncio.to_thread(req._calendar_filter, s_iso, e_iso)
+        cursor = self.database.events.find(filt, req.CALENDAR_PROJECTION).sort([("start_at", 1)])
+        return req._calendar_ordered([req._calendar_item(d) async for d in cursor], filt)
+
+    async def attachment(self, request, file_id):
+        """Async twin of req.get_attachment(): same headers, 304 / 206 / 416 handling."""
+        try:
+            grid_out = await AsyncGridFSBucket(self.database).open_download_stream(ObjectId(file_id))
+        except (NoFile, InvalidId, TypeError):
+            return self._json({"success": False, "message": "File not found"}, 404), None
+
+        rv = req._attachment_response(self.flask_app.response_class, grid_out, file_id, ())
+        rv = rv.make_conditional(request, accept_ranges=True, complete_length=grid_out.length)
+        if rv.status_code == 206:
+            start, stop = rv.content_range.start, rv.content_range.stop
+        elif rv.status_code == 200:
+            start, stop = 0, grid_out.length
+        else:
+            return rv, None   # 304
+        return rv, self._gridfs_chunks(grid_out, start, stop)
+
+    @staticmethod
+    async def _gridfs_chunks(grid_out, start, stop):
+        await grid_out.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = await grid_out.readchunk()
+            if not chunk:
+                break
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+
+    # --- everything else: the Flask app on the thread pool ---
+
+    async def _wsgi(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        body, size = await _read_body(receive)
+        environ = _environ(scope, body)
+        environ["CONTENT_LENGTH"] = str(size)   # chunked uploads arrive already de-chunked
+        environ.pop("HTTP_TRANSFER_ENCODING", None)
+        queue = asyncio.Queue(STREAM_QUEUE_DEPTH)
+        state = {"gone": False}
+
+        def start_response(status, headers, exc_info=None):
+            state["start"] = (int(status.split(" ", 1)[0]), headers)
+            return lambda data: emit(("body", data))
+
+        def emit(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def run():
+            # one thread for the whole response: stream_with_context bodies keep their app context
+            try:
+                result = self.flask_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if state["gone"]:
+                            break
+                        if chunk:
+                            emit(("body", chunk))
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+            except BaseException as e:
+                emit(("error", e))
+                return
+            emit(("end", None))
+
+        worker = loop.run_in_executor(self._pool, run)
+        started = False
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "error" and started:
+                    raise value
+                if kind == "error":
+                    self.flask_app.logger.error("wsgi %s %s failed", scope["method"], scope["path"], exc_info=value)
+                    await send({"type": "http.response.start", "status": 500,
+                                "headers": [(b"content-type", b"text/plain")]})
+                    await send({"type": "http.response.body", "body": b"Internal Server Error"})
+                    break
+                if not started:
+                    status, headers = state["start"]
+                    await send({"type": "http.response.start", "status": status, "headers": _asgi_headers(headers)})
+                    started = True
+                if kind == "end":
+                    await send({"type": "http.response.body", "body": b""})
+                    break
+                await send({"type": "http.response.body", "body": value, "more_body": True})
+        except BaseException:
+            state["gone"] = True   # client went away: let the worker stop and close the body
+            while not worker.done():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.01)
+            raise
+        finally:
+            environ["wsgi.input"].close()
+        await worker
+
+
+def create_asgi_app(flask_app, database=None, redis_client=None):
+    """
+    ASGI application for flask_app (see module docstring). database / redis_client
+    default to clients built from ASYNC_MONGO_URI / ASYNC_REDIS_URL on first use.
+    """
+    return AsyncReadApp(flask_app, database=database, redis_client=redis_client)
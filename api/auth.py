@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 from bson import ObjectId
-import bcrypt
 from .. import db  # MongoDB instance from app factory
+from . import passwords, signups
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
@@ -49,20 +49,20 @@ def normalize_role(user_type: str) -> str:
 # Helpers
 # -------------------
 
+# bcrypt runs on the bounded pool in api/passwords.py (503 Retry-After when saturated)
+
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed.decode("utf-8")
+    return passwords.hash_password(password)
 
 def check_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    return passwords.check_password(password, hashed)
 
 def init_user_collection():
     """Ensure users collection exists and has required indexes."""
+    from .indexes import ensure_indexes  # registry owns the index definitions
     if "users" not in db.list_collection_names():
         db.create_collection("users")
-    db.users.create_index("username", unique=True)
-    db.users.create_index("email", unique=True)
+    ensure_indexes()
 
 def _maybe_objectid(v):
     try:
@@ -125,6 +125,16 @@ def login():
     if not check_password(password, hashed):
         return jsonify({"success": False, "error": "Invalid credentials"}), 401
 
+    # transparently upgrade hashes made with a different BCRYPT_ROUNDS
+    if passwords.needs_rehash(hashed):
+        try:
+            db.users.update_one(
+                {"_id": user["_id"], "password_hash": hashed},
+                {"$set": {"password_hash": hash_password(password)}}
+            )
+        except passwords.PasswordBusy:
+            pass  # keep the old hash; retried on a later login
+
     if user.get("active") is False:
         return jsonify({"success": False, "error": "Account deactivated"}), 403
 
@@ -207,23 +217,25 @@ def register_event():
     if not event_id:
         return jsonify({"success": False, "error": "Missing event_id"}), 400
 
-    # 3) Load user
-    try:
-        user = db.users.find_one({"_id": ObjectId(uid)})
-    except Exception:
+    user_oid = _maybe_objectid(uid)
+    if user_oid is None:
         return jsonify({"success": False, "error": "Invalid user id"}), 400
-    if not user:
-        return jsonify({"success": False, "error": "User not found"}), 404
-
-    result = db.users.update_one(
-        {"_id": user["_id"]},
-        {"$addToSet": {"signups": {"event_id": event_id, "status": "attending"}}}
-    )
-
+    event_oid = _maybe_objectid(event_id)
+    if event_oid is None:
+        return jsonify({"success": False, "error": "Invalid event_id"}), 400
+
+    # 3) Insert signup + claim a seat with one conditional $inc (see api/signups.py)
+    outcome = signups.register(event_oid, user_oid)
+    if outcome == signups.NO_EVENT:
+        return jsonify({"success": False, "error": "Event not found"}), 404
+    if outcome == signups.FULL:
+        return jsonify({"success": False, "error": "Event is full"}), 409
+
+    registered = (outcome == signups.REGISTERED)
     return jsonify({
         "success": True,
-        "updated": bool(result.modified_count),
-        "message": "Registered for event" if result.modified_count else "Already registered",
+        "updated": registered,
+        "message": "Registered for event" if registered else "Already registered",
     }), 200
 
 @auth_bp.post("/unregister_event")
@@ -241,24 +253,27 @@ def unregister_event():
 
     eid_str = raw_eid
     eid_oid = _maybe_objectid(raw_eid)
+    user_oid = _maybe_objectid(uid)
+    if user_oid is None:
+        return jsonify(success=False, error="Invalid user id"), 400
+
+    if eid_oid is not None and signups.unregister(eid_oid, user_oid):
+        return jsonify(success=True, message="Unregistered from event")
 
-    # Pull any signup object that matches this event under the canonical DB key 'event_id'
-    # Handle both string and ObjectId storage forms to be tolerant of legacy data.
+    # Legacy: signups embedded in the user document (before `flask signups migrate`).
+    # Handle both string and ObjectId storage forms.
     pull_match = {"$or": [{"event_id": eid_str}]}
     if eid_oid is not None:
         pull_match["$or"].append({"event_id": eid_oid})
 
     result = db.users.update_one(
-        {"_id": ObjectId(uid)},
+        {"_id": user_oid},
         {"$pull": {"signups": pull_match}}
     )
 
     if result.modified_count == 0:
         return jsonify(success=False, error="Signup not found for this user"), 404
 
-    # If you also mirror attendees on events, uncomment to keep parity:
-    # db.events.update_one({"_id": (eid_oid or ObjectId(eid_str))}, {"$pull": {"attendees": ObjectId(uid)}})
-
     return jsonify(success=True, message="Unregistered from event")
 
 # -------- Legacy admin-like routes (kept for compatibility) --------
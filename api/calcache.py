@@ -0,0 +1,184 @@
+# backend/api/calcache.py
+"""
+Redis cache for the public calendar range endpoints.
+
+Only month-aligned windows of at most MAX_WINDOW_MONTHS are cached: a request
+is served from the aligned window covering it (cache_window()) and sliced, and
+wider requests are not cached, so clients cannot create keys at will. Every
+cached window is also recorded in a sorted set scored by its expiry, so a write
+to an event only drops the windows it overlaps and members whose entry expired
+by TTL are trimmed.
+Fills are guarded by a generation counter: an invalidation that races with a
+fill bumps the counter and the stale fill is discarded.
+Redis errors never fail a request; the endpoints fall back to Mongo.
+"""
+
+import time
+
+import redis
+from flask import current_app
+
+PREFIX = "calcache"
+# bump whenever the cached value format or key layout changes (v2: b"id,id,...\n" +
+# items JSON; v3: ranges as a sorted set) so entries written by older code are never read
+FORMAT_VERSION = 3
+RANGES_KEY = f"{PREFIX}:v{FORMAT_VERSION}:ranges"    # zset: "start|end" -> expiry (epoch s)
+GEN_KEY = f"{PREFIX}:gen"
+LAST_WRITE_KEY = f"{PREFIX}:last_write"   # epoch seconds of the newest event write
+TTL_SECONDS = 6 * 3600             # safety net; invalidation is the primary expiry
+MAX_WINDOW_MONTHS = 3              # a month view grid spans at most three months
+
+
+def _redis():
+    return current_app.config.get("SESSION_REDIS")
+
+def _key(s_iso: str, e_iso: str) -> str:
+    return f"{PREFIX}:v{FORMAT_VERSION}:range:{s_iso}|{e_iso}"
+
+def _month_iso(year: int, month: int) -> str:
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return f"{year:04d}-{month:02d}-01T00:00:00Z"
+
+def cache_window(s_iso: str, e_iso: str):
+    """
+    The cacheable window covering [s_iso, e_iso): from the first of s's month
+    to the first of the month after e, or None when that spans more than
+    MAX_WINDOW_MONTHS (serve uncached). Expects the '...T00:00:00Z' bounds of
+    req._parse_window().
+    """
+    sy, sm = int(s_iso[0:4]), int(s_iso[5:7])
+    ey, em = int(e_iso[0:4]), int(e_iso[5:7])
+    if e_iso[8:10] != "01" or e_iso[10:] != "T00:00:00Z":
+        em += 1   # end is exclusive: a window ending on the 1st needs no extra month
+    months = (ey - sy) * 12 + (em - sm)
+    if e_iso <= s_iso or months > MAX_WINDOW_MONTHS:
+        return None
+    return _month_iso(sy, sm), _month_iso(ey, em)
+
+def generation():
+    """Current generation; pass it back to put() so racing writes are detected."""
+    r = _redis()
+    if r is None:
+        return None
+    try:
+        return int(r.get(GEN_KEY) or 0)
+    except redis.RedisError:
+        return None
+
+def last_write():
+    """Epoch seconds of the newest event write seen by invalidate(), or None."""
+    r = _redis()
+    if r is None:
+        return None
+    try:
+        raw = r.get(LAST_WRITE_KEY)
+        return float(raw) if raw is not None else None
+    except (redis.RedisError, ValueError):
+        return None
+
+def get(s_iso: str, e_iso: str):
+    """Cached serialized items (bytes) or None."""
+    r = _redis()
+    if r is None:
+        return None
+    try:
+        return r.get(_key(s_iso, e_iso))
+    except redis.RedisError:
+        return None
+
+def put(s_iso: str, e_iso: str, payload: bytes, gen) -> bool:
+    """Store payload unless an invalidation happened since `gen` was read."""
+    r = _redis()
+    if r is None or gen is None:
+        return False
+    try:
+        with r.pipeline() as pipe:
+            pipe.watch(GEN_KEY)
+            if int(pipe.get(GEN_KEY) or 0) != gen:
+                return False
+            pipe.multi()
+            now = time.time()
+            pipe.set(_key(s_iso, e_iso), payload, ex=TTL_SECONDS)
+            pipe.zadd(RANGES_KEY, {f"{s_iso}|{e_iso}": now + TTL_SECONDS})
+            pipe.zremrangebyscore(RANGES_KEY, "-inf", now)
+            pipe.execute()
+        return True
+    except (redis.WatchError, redis.RedisError):
+        return False
+
+# -----------------------
+# redis.asyncio variants (api/asyncread.py); same keys, same error handling
+# -----------------------
+
+async def generation_async(r):
+    if r is None:
+        return None
+    try:
+        return int(await r.get(GEN_KEY) or 0)
+    except redis.RedisError:
+        return None
+
+async def get_async(r, s_iso: str, e_iso: str):
+    if r is None:
+        return None
+    try:
+        return await r.get(_key(s_iso, e_iso))
+    except redis.RedisError:
+        return None
+
+async def put_async(r, s_iso: str, e_iso: str, payload: bytes, gen) -> bool:
+    if r is None or gen is None:
+        return False
+    try:
+        async with r.pipeline() as pipe:
+            await pipe.watch(GEN_KEY)
+            if int(await pipe.get(GEN_KEY) or 0) != gen:
+                return False
+            pipe.multi()
+            now = time.time()
+            pipe.set(_key(s_iso, e_iso), payload, ex=TTL_SECONDS)
+            pipe.zadd(RANGES_KEY, {f"{s_iso}|{e_iso}": now + TTL_SECONDS})
+            pipe.zremrangebyscore(RANGES_KEY, "-inf", now)
+            await pipe.execute()
+        return True
+    except (redis.WatchError, redis.RedisError):
+        return False
+
+# -----------------------
+# Invalidation
+# -----------------------
+
+def invalidate(start_iso=None, end_iso=None) -> int:
+    """
+    Drop every cached window overlapping [start_iso, end_iso).
+    With either bound missing (undated event) every window is dropped.
+    Returns the number of windows removed.
+    """
+    return invalidate_many([(start_iso, end_iso)])
+
+def invalidate_many(ranges) -> int:
+    """invalidate() for many event ranges in one pass over the cached windows."""
+    ranges = list(ranges)
+    r = _redis()
+    if r is None or not ranges:
+        return 0
+    try:
+        now = time.time()
+        r.incr(GEN_KEY)
+        r.set(LAST_WRITE_KEY, int(now))
+        r.zremrangebyscore(RANGES_KEY, "-inf", now)   # entries already gone by TTL
+        stale = []
+        for member in r.zrange(RANGES_KEY, 0, -1):
+            m = member.decode("utf-8") if isinstance(member, bytes) else member
+            s_iso, _, e_iso = m.partition("|")
+            if any(start_iso is None or end_iso is None or (start_iso < e_iso and end_iso > s_iso)
+                   for start_iso, end_iso in ranges):
+                stale.append(m)
+        if stale:
+            with r.pipeline() as pipe:
+                pipe.delete(*[_key(*m.split("|", 1)) for m in stale])
+                pipe.zrem(RANGES_KEY, *stale)
+                pipe.execute()
+        return len(stale)
+    except redis.RedisError:
+        return 0
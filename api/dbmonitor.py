@@ -0,0 +1,191 @@
+# backend/api/dbmonitor.py
+"""
+MongoDB command monitoring.
+
+`monitor` is a pymongo CommandListener passed to the MongoClient in
+create_app's module. For every command it:
+  - adds one query and its duration to the current request's totals
+    (exposed as X-DB-Queries / X-DB-Time headers when DB_QUERY_HEADERS, the
+    default in debug mode, and logged at DEBUG level);
+  - logs commands slower than DB_SLOW_MS with their filter shape, values
+    redacted to "?", and, when DB_EXPLAIN_SLOW, a plan summary such as
+    "IXSCAN(status_start_at_id) > FETCH > LIMIT" from a queryPlanner explain
+    run on a background thread.
+
+Listener callbacks run synchronously on the thread that issued the command,
+so per-request totals are thread-local. This module must not import the
+package (it is loaded before the client is created).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request
+from pymongo import monitoring
+
+DEFAULT_SLOW_MS = 100
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+MAX_PENDING_EXPLAINS = 8
+# command fields that are driver/session plumbing rather than the query itself
+_PLUMBING = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+
+def redact(value, depth=0):
+    """Query shape: keys and operators kept, every value replaced with '?'."""
+    if depth > 8:
+        return "?"
+    if isinstance(value, dict):
+        return {k: redact(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(v, (dict, list, tuple)) for v in value):
+            return [redact(v, depth + 1) for v in value]   # $or branches, pipeline stages
+        return ["?"]                                         # $in values etc.: length hidden too
+    return "?"
+
+def shape(command_name: str, command: dict):
+    """The redacted filter / pipeline part of a command, for logging."""
+    if command_name in ("find", "count", "distinct", "findAndModify", "delete", "update"):
+        if "filter" in command or "query" in command:
+            return redact(command.get("filter", command.get("query")))
+        ops = command.get("updates") or command.get("deletes") or []
+        return redact([op.get("q") for op in ops[:1]]) if ops else None
+    if command_name == "aggregate":
+        return redact(command.get("pipeline"))
+    return None
+
+def plan_summary(explain: dict) -> str:
+    """'IXSCAN(name) > FETCH > LIMIT' from an explain result (find or aggregate)."""
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        for stage in explain.get("stages") or []:
+            cursor = stage.get("$cursor") if isinstance(stage, dict) else None
+            if cursor:
+                planner = cursor.get("queryPlanner")
+                break
+    if not planner:
+        return "unknown"
+    steps, node = [], planner.get("winningPlan") or {}
+    node = node.get("queryPlan", node)   # SBE plans nest the classic tree
+    while node:
+        name = node.get("stage", "?")
+        steps.append(f"{name}({node['indexName']})" if node.get("indexName") else name)
+        children = node.get("inputStages")
+        node = node.get("inputStage") or (children[0] if children else None)
+    return " > ".join(reversed(steps))
+
+
+class CommandMonitor(monitoring.CommandListener):
+    def __init__(self):
+        self.slow_ms = DEFAULT_SLOW_MS
+        self.explain_slow = True
+        self.logger = None
+        self.client = None
+        self._local = threading.local()
+        self._started = {}            # (connection, request_id) -> (command, db name)
+        self._lock = threading.Lock()
+        self._explainer = None
+        self._pending = threading.BoundedSemaphore(MAX_PENDING_EXPLAINS)
+
+    # --- per-request totals ---
+
+    def begin(self):
+        self._local.totals = [0, 0]   # commands, microseconds
+
+    def end(self):
+        totals = getattr(self._local, "totals", None)
+        self._local.totals = None
+        return (totals[0], totals[1] / 1000.0) if totals else (0, 0.0)
+
+    # --- CommandListener ---
+
+    def started(self, event):
+        if getattr(self._local, "explaining", False):
+            return
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (event.command, event.database_name)
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+    def _finished(self, event):
+        if getattr(self._local, "explaining", False):
+            return
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        totals = getattr(self._local, "totals", None)
+        if totals is not None:
+            totals[0] += 1
+            totals[1] += event.duration_micros
+        ms = event.duration_micros / 1000.0
+        if ms >= self.slow_ms and started is not None and self.logger is not None:
+            self._log_slow(event.command_name, started[0], started[1], ms)
+
+    # --- slow log ---
+
+    def _log_slow(self, command_name, command, db_name, ms):
+        collection = command.get(command_name)
+        self.logger.warning(
+            "slow mongo %s %s.%s %.1fms shape=%s",
+            command_name, db_name, collection, ms, shape(command_name, command),
+        )
+        if self.explain_slow and self.client is not None and command_name in EXPLAINABLE \
+                and self._pending.acquire(blocking=False):
+            inner = {k: v for k, v in command.items() if not k.startswith("$") and k not in _PLUMBING}
+            try:
+                self._executor().submit(self._explain, command_name, db_name, collection, inner)
+            except RuntimeError:
+                self._pending.release()   # interpreter shutting down
+
+    def _executor(self):
+        if self._explainer is None:
+            with self._lock:
+                if self._explainer is None:
+                    self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mongo-explain")
+        return self._explainer
+
+    def _explain(self, command_name, db_name, collection, inner):
+        self._local.explaining = True
+        try:
+            t0 = time.perf_counter()
+            result = self.client[db_name].command("explain", inner, verbosity="queryPlanner")
+            self.logger.warning(
+                "slow mongo %s %s.%s plan: %s (explain %.1fms)",
+                command_name, db_name, collection, plan_summary(result), (time.perf_counter() - t0) * 1000,
+            )
+        except Exception as e:
+            self.logger.info("explain for slow %s %s.%s failed: %s", command_name, db_name, collection, e)
+        finally:
+            self._local.explaining = False
+            self._pending.release()
+
+
+monitor = CommandMonitor()
+
+
+def init_app(app, client):
+    """
+    Configure the listener and add the per-request hooks. Commands issued while
+    a streamed body is being sent happen after the headers and are not counted.
+    """
+    monitor.slow_ms = float(app.config.get("DB_SLOW_MS", DEFAULT_SLOW_MS))
+    monitor.explain_slow = bool(app.config.get("DB_EXPLAIN_SLOW", True))
+    monitor.logger = app.logger
+    monitor.client = client
+    headers = bool(app.config.get("DB_QUERY_HEADERS", app.debug))
+
+    @app.before_request
+    def _db_begin():
+        monitor.begin()
+
+    @app.after_request
+    def _db_headers(response):
+        queries, ms = monitor.end()
+        if headers:
+            response.headers["X-DB-Queries"] = str(queries)
+            response.headers["X-DB-Time"] = f"{ms:.1f}ms"
+        app.logger.debug("%s %s: %d mongo commands, %.1fms", response.status_code, request.path, queries, ms)
+        return response
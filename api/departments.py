@@ -0,0 +1,103 @@
+# backend/api/departments.py
+"""
+Canonical departments field.
+
+pub_req and events store `departments` as a flat array of names, indexed
+(multikey) so a department filter is a plain equality match. Older documents
+hold a {"type", "departments": [...]} dict, a JSON string or a comma list;
+migrate() rewrites those in the background at startup (or via
+`flask departments migrate`). Until it has finished, match() also covers the
+nested dict shape.
+"""
+
+import json
+from datetime import datetime, timezone
+
+import click
+from pymongo import UpdateOne
+
+from .. import db
+from . import calcache, migrations
+
+MIGRATION_ID = "departments_flat"
+COLLECTIONS = ("pub_req", "events")
+BATCH_SIZE = 500
+
+
+def normalize(raw) -> list:
+    """Any accepted input shape → de-duplicated list of non-empty names."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError:
+            raw = raw.split(",")
+    if isinstance(raw, dict):
+        raw = raw.get("departments")
+    if raw is None:
+        return []
+    if not isinstance(raw, list):
+        raw = [raw]
+    out = []
+    for d in raw:
+        name = str(d).strip() if d is not None else ""
+        if name and name not in out:
+            out.append(name)
+    return out
+
+def match(dept: str) -> dict:
+    """Filter for documents tagged with dept."""
+    if migrations.is_done(MIGRATION_ID):
+        return {"departments": dept}
+    return {"$or": [{"departments": dept}, {"departments.departments": dept}]}
+
+# -----------------------
+# Migration
+# -----------------------
+
+def migrate(database=None, batch_size=BATCH_SIZE) -> dict:
+    """
+    Rewrite every non-array departments value as a flat array. Each update is
+    conditional on the value it read, so concurrent edits win. Converted events
+    get a new updated_at (the iCalendar feed re-renders them) and the calendar
+    cache is dropped once at the end. Returns {collection: documents rewritten}.
+    """
+    database = database if database is not None else db
+    rewritten = {}
+    for name in COLLECTIONS:
+        coll = database[name]
+        n, last_id = 0, None
+        while True:
+            filt = {"departments": {"$not": {"$type": "array"}}}
+            if last_id is not None:
+                filt["_id"] = {"$gt": last_id}
+            docs = list(coll.find(filt, {"departments": 1}).sort("_id", 1).limit(batch_size))
+            if not docs:
+                break
+            last_id = docs[-1]["_id"]
+            now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            ops = []
+            for d in docs:
+                upd = {"departments": normalize(d.get("departments"))}
+                if name == "events":
+                    upd["updated_at"] = now
+                ops.append(UpdateOne({"_id": d["_id"], "departments": d.get("departments")}, {"$set": upd}))
+            n += coll.bulk_write(ops, ordered=False).modified_count
+        rewritten[name] = n
+
+    migrations.mark_done(MIGRATION_ID, database, rewritten=rewritten)
+    if rewritten.get("events"):
+        calcache.invalidate()
+    return rewritten
+
+def init_app(app):
+    @app.cli.group("departments")
+    def departments_cli():
+        """Departments field maintenance."""
+
+    @departments_cli.command("migrate")
+    def migrate_cmd():
+        """Rewrite legacy departments values as flat arrays."""
+        click.echo(f"rewritten {migrate()}")
+
+    if app.config.get("DEPARTMENTS_MIGRATE_ON_STARTUP", True) and not migrations.is_done(MIGRATION_ID):
+        migrations.run_in_background(app, "departments", migrate)
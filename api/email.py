@@ -3,7 +3,9 @@ import bcrypt
 from .. import db  # MongoDB instance from app factory
 from .. import mail
 from flask_mail import Message
-from datetime import datetime
+from bson import ObjectId
+from . import email_templates, mailer, outbox
+from .guards import roles_any
 
 email_bp = Blueprint("email", __name__, url_prefix="/api/email")
 
@@ -21,73 +23,50 @@ def send_email():
     body = data.get("body", "")
     html = data.get("html")
 
-    recipient_name = data.get("author", "Representative")
-    event_title = data.get("subject", "Your Event Submission")
-    feedback_message = data.get("body", "Thank you for your submission. We’ll review it shortly.")
-    status = data.get("status", "Unreviewed")
-    year = datetime.now().year
-
     if not html:
-        html = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-          <meta charset="UTF-8" />
-          <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-          <title>KUE Feedback</title>
-        </head>
-        <body style="font-family: 'Segoe UI', Arial, sans-serif; background-color: #f3f4f6; margin: 0; padding: 0; color: #333;">
-          <div style="max-width: 600px; margin: 30px auto; background-color: #ffffff; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 6px rgba(0,0,0,0.05);">
-            
-            <!-- Header -->
-            <div style="background-color: #fafafa; border-bottom: 1px solid #e5e7eb; text-align: center; padding: 20px;">
-              <h1 style="margin: 0; font-size: 20px; color: #333;">Karlstad University Events (KUE)</h1>
-            </div>
-            
-            <!-- Body -->
-            <div style="padding: 30px 25px; line-height: 1.6;">
-              <p style="margin-top: 0;">Dear {recipient_name},</p>
-
-              <p>We have reviewed your recent publication request titled <strong>{event_title}</strong>.</p>
-
-              <h2 style="font-size: 17px; color: #444;">Publication Status</h2>
-              <div style="background-color: #e5e7eb; color: #111827; display: inline-block; padding: 6px 12px; border-radius: 6px; font-weight: 600;">
-                {status}
-              </div>
-
-              <div style="background-color: #f9fafb; border-left: 4px solid #d1d5db; padding: 15px; margin: 20px 0; color: #4b5563; font-style: italic;">
-                {feedback_message}
-              </div>
-
-              <p>If you have any further questions, please don’t hesitate to contact your appointed event coordinator.</p>
-
-              <p style="margin-bottom: 0;">Best regards,<br>
-              <strong>Karlstad University Events (KUE)</strong><br>
-              Karlstad University<br> Appointed event coordiantor:
-              <a href="mailto:{sender}" style="color: #2563eb; text-decoration: none;">{sender}</a></p>
-            </div>
-
-            <!-- Footer -->
-            <div style="background-color: #f9fafb; border-top: 1px solid #e5e7eb; text-align: center; padding: 15px; font-size: 13px; color: #6b7280;">
-              © {year} Karlstad University Events — All rights reserved.
-            </div>
-          </div>
-        </body>
-        </html>
-        """
-
-    msg = Message(
+        # compiled once at startup (api/email_templates.py); user fields are autoescaped
+        html, body = email_templates.render_feedback(
+            recipient_name=data.get("author", "Representative"),
+            event_title=data.get("subject", "Your Event Submission"),
+            status=data.get("status", "Unreviewed"),
+            feedback_message=data.get("body", "Thank you for your submission. We’ll review it shortly."),
+            sender=sender,
+        )
+
+    # delivered by the outbox workers (api/outbox.py); SMTP never blocks the request
+    message_id = outbox.enqueue(
         subject=subject,
         recipients=[recipient],
         body=body,  # plain text fallback
         html=html,  # improved HTML template
         sender=session.get("email"),
     )
-
-    mail.send(msg)
-    return jsonify({"message": f"Email sent successfully to {recipient}"}), 200
-
-
+    return jsonify({
+        "message": f"Email queued for {recipient}",
+        "id": str(message_id),
+        "status_url": f"/api/email/status/{message_id}",
+    }), 202
+
+@email_bp.route("/status/<string:message_id>", methods=["GET"])
+@roles_any({"staff", "admin"})
+def email_status(message_id):
+    try:
+        oid = ObjectId(message_id)
+    except Exception:
+        return jsonify({"message": "Invalid id"}), 400
+
+    status = outbox.status_of(oid)
+    if status is None:
+        return jsonify({"message": "Not found"}), 404
+    return jsonify(status), 200
+
+
+
+@email_bp.route("/metrics", methods=["GET"])
+@roles_any({"staff", "admin"})
+def email_metrics():
+    """SMTP pool throughput counters for this worker process."""
+    return jsonify(mailer.stats()), 200
 
 # Tests
 
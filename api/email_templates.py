@@ -0,0 +1,71 @@
+# backend/api/email_templates.py
+"""
+Compiled Jinja2 templates for outgoing email (api/templates/email/).
+
+Every template pair (NAME.html + NAME.txt) is loaded and compiled once by
+load(); HTML is autoescaped, plain text is not. The static header/footer
+fragments are rendered once (per year) and injected as Markup, so a render
+only evaluates the per-message parts.
+"""
+
+import os
+from datetime import datetime
+from functools import lru_cache
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+from markupsafe import Markup
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates", "email")
+
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+    auto_reload=False,          # compiled once; restart to pick up template edits
+    undefined=StrictUndefined,
+    cache_size=-1,
+)
+
+_compiled = {}
+
+def load():
+    """Compile every template in TEMPLATE_DIR (called at startup)."""
+    for fname in sorted(os.listdir(TEMPLATE_DIR)):
+        if fname.endswith((".html", ".txt")):
+            _compiled[fname] = _env.get_template(fname)
+    return sorted(_compiled)
+
+def _template(fname):
+    tpl = _compiled.get(fname)
+    if tpl is None:
+        tpl = _compiled[fname] = _env.get_template(fname)
+    return tpl
+
+@lru_cache(maxsize=4)
+def _fragments(year: int):
+    """Static header/footer HTML; only the footer's year ever changes."""
+    return (
+        Markup(_template("_header.html").render()),
+        Markup(_template("_footer.html").render(year=year)),
+    )
+
+def render(name: str, **context):
+    """Render NAME.html and NAME.txt; returns (html, text)."""
+    year = datetime.now().year
+    header, footer = _fragments(year)
+    html = _template(f"{name}.html").render(header=header, footer=footer, year=year, **context)
+    text = _template(f"{name}.txt").render(year=year, **context)
+    return html, text
+
+def render_feedback(recipient_name, event_title, status, feedback_message, sender):
+    return render(
+        "feedback",
+        recipient_name=recipient_name,
+        event_title=event_title,
+        status=status,
+        feedback_message=feedback_message,
+        sender=sender,
+    )
+
+def init_app(app):
+    with app.app_context():
+        app.logger.debug("email templates compiled: %s", ", ".join(load()))
@@ -0,0 +1,218 @@
+# backend/api/ical.py
+"""
+iCalendar (RFC 5545) feed of db.events for pollers (portals, calendar apps).
+
+Each event's VEVENT block is rendered once and kept in a Redis hash together
+with the event's write stamp (updated_at / created_at), so rebuilding a feed
+only renders events that are new or changed. The hash is per UTC day (like the
+feed's past-days horizon) and expires after VEVENTS_TTL_SECONDS, so blocks of
+edited or deleted events don't pile up. Assembled feeds are cached per
+calcache generation: every event write bumps it (calcache.invalidate), which
+also makes the generation a cheap ETag. Last-Modified is the time of the
+newest event write. Redis errors only cost the caching.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import redis
+from flask import current_app, request
+from werkzeug.http import is_resource_modified
+
+from .. import db
+from . import calcache, departments, migrations, timefields
+
+PREFIX = "ical"
+VEVENTS_KEY = f"{PREFIX}:vevent"   # + ":YYYYMMDD" hash: event id -> "stamp\n" + VEVENT block
+VEVENTS_TTL_SECONDS = 2 * 24 * 3600
+FEED_TTL_SECONDS = 24 * 3600
+DEFAULT_PAST_DAYS = 365
+DEFAULT_MAX_AGE = 300
+PRODID = "-//Karlstad University Events//Calendar//EN"
+
+_FIELDS = {
+    "_id": 1, "title": 1, "description": 1, "location": 1, "departments": 1,
+    "start_at": 1, "end_at": 1, "start_iso": 1, "end_iso": 1,
+    "created_at": 1, "updated_at": 1,
+}
+
+
+def _redis():
+    return current_app.config.get("SESSION_REDIS")
+
+def _vevents_key() -> str:
+    return f"{VEVENTS_KEY}:{datetime.now(timezone.utc):%Y%m%d}"
+
+# -----------------------
+# Rendering
+# -----------------------
+
+def _escape(text) -> str:
+    return (str(text or "").replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets (continuation lines start with a space)."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts, limit = [], 75
+    while raw:
+        cut = min(limit, len(raw))
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:  # never split a UTF-8 sequence
+            cut -= 1
+        parts.append(raw[:cut].decode("utf-8"))
+        raw, limit = raw[cut:], 74
+    return "\r\n ".join(parts)
+
+def _ical_time(iso: str) -> str:
+    return iso.replace("-", "").replace(":", "").split(".")[0].rstrip("Z") + "Z"
+
+def _stamp(doc) -> str:
+    return str(doc.get("updated_at") or doc.get("created_at") or "")
+
+def vevent(doc) -> str:
+    """VEVENT block for one event (CRLF line endings, folded)."""
+    start, end = timefields.doc_time(doc, "start"), timefields.doc_time(doc, "end")
+    uid_domain = current_app.config.get("ICAL_UID_DOMAIN", "karlstad-university-events")
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{doc['_id']}@{uid_domain}",
+        f"DTSTAMP:{_ical_time(doc.get('created_at') or start)}",
+        f"DTSTART:{_ical_time(start)}",
+        f"DTEND:{_ical_time(end or start)}",
+        f"SUMMARY:{_escape(doc.get('title'))}",
+    ]
+    if doc.get("location"):
+        lines.append(f"LOCATION:{_escape(doc['location'])}")
+    if doc.get("description"):
+        lines.append(f"DESCRIPTION:{_escape(doc['description'])}")
+    depts = doc.get("departments") or []
+    if depts:
+        lines.append("CATEGORIES:" + ",".join(_escape(d) for d in depts))
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+# -----------------------
+# Feed assembly
+# -----------------------
+
+def _filter(dept, since: datetime) -> dict:
+    filt = {"start_at": {"$ne": None}, "end_at": {"$gt": since}}
+    if not migrations.is_done(timefields.MIGRATION_ID):
+        # events the timefields backfill has not converted yet
+        legacy = {"start_iso": {"$ne": None}, "end_iso": {"$gt": timefields.to_iso(since)}}
+        filt = {"$or": [filt, legacy]}
+    if dept:
+        filt = {"$and": [filt, {"$or": [departments.match(dept), {"publish_all": True}]}]}
+    return filt
+
+def _blocks(stubs) -> list:
+    """VEVENT blocks in stub order; only events missing or stale in the hash are rendered."""
+    r = _redis()
+    key = _vevents_key()
+    ids = [str(s["_id"]) for s in stubs]
+    cached = [None] * len(ids)
+    if r is not None and ids:
+        try:
+            cached = r.hmget(key, ids)
+        except redis.RedisError:
+            r = None
+
+    blocks, missing = [None] * len(ids), {}
+    for i, (stub, raw) in enumerate(zip(stubs, cached)):
+        if raw is not None:
+            stamp, _, block = raw.decode("utf-8").partition("\n")
+            if stamp == _stamp(stub):
+                blocks[i] = block
+                continue
+        missing[stub["_id"]] = i
+
+    if missing:
+        fresh = {}
+        for doc in db.events.find({"_id": {"$in": list(missing)}}, _FIELDS):
+            block = vevent(doc)
+            blocks[missing[doc["_id"]]] = block
+            fresh[str(doc["_id"])] = f"{_stamp(doc)}\n{block}"
+        if r is not None and fresh:
+            try:
+                pipe = r.pipeline(transaction=False)
+                pipe.hset(key, mapping=fresh)
+                pipe.expire(key, VEVENTS_TTL_SECONDS)
+                pipe.execute()
+            except redis.RedisError:
+                pass
+    return [b for b in blocks if b is not None]
+
+def build(dept=None) -> bytes:
+    """Full VCALENDAR for all events (or one department) ending after the past-days horizon."""
+    past_days = int(current_app.config.get("ICAL_PAST_DAYS", DEFAULT_PAST_DAYS))
+    since = datetime.now(timezone.utc) - timedelta(days=past_days)
+    stubs = list(db.events.find(_filter(dept, since), {"_id": 1, "created_at": 1, "updated_at": 1})
+                 .sort([("start_at", 1), ("_id", 1)]))
+    name = f"Karlstad University Events – {dept}" if dept else "Karlstad University Events"
+    head = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        _fold(f"X-WR-CALNAME:{_escape(name)}"),
+    ]
+    return ("\r\n".join(head) + "\r\n" + "".join(_blocks(stubs)) + "END:VCALENDAR\r\n").encode("utf-8")
+
+def forget(event_id):
+    """Drop a deleted event's cached block."""
+    r = _redis()
+    if r is None:
+        return
+    try:
+        r.hdel(_vevents_key(), str(event_id))   # earlier days' hashes expire
+    except redis.RedisError:
+        pass
+
+def feed_response(dept=None):
+    """
+    text/calendar response with ETag (generation + day + department) and
+    Last-Modified (newest event write); matching conditional requests get a
+    bodyless 304 before anything is read from Mongo.
+    """
+    gen = calcache.generation()
+    day = datetime.now(timezone.utc).strftime("%Y%m%d")   # the past-days horizon moves daily
+    last_write = calcache.last_write()
+
+    rv = current_app.response_class(mimetype="text/calendar")   # text/* gets "; charset=utf-8"
+    rv.cache_control.public = True
+    rv.cache_control.max_age = int(current_app.config.get("ICAL_MAX_AGE", DEFAULT_MAX_AGE))
+    if last_write is not None:
+        rv.last_modified = datetime.fromtimestamp(int(last_write), timezone.utc)
+
+    if gen is None:
+        body = build(dept)   # no Redis: still conditional, keyed on the content itself
+        rv.set_etag(hashlib.sha1(body).hexdigest())
+    else:
+        etag = f"ical-{gen}-{day}-" + hashlib.sha1((dept or "*").encode("utf-8")).hexdigest()[:12]
+        rv.set_etag(etag)
+        if not is_resource_modified(request.environ, etag=etag, last_modified=rv.last_modified):
+            rv.status_code = 304
+            return rv
+        body = _cached_feed(gen, day, dept)
+
+    rv.set_data(body)
+    return rv.make_conditional(request)
+
+def _cached_feed(gen, day, dept) -> bytes:
+    r = _redis()
+    key = f"{PREFIX}:feed:{gen}:{day}:{dept or '*'}"
+    try:
+        body = r.get(key)
+    except redis.RedisError:
+        body = None
+    if body is None:
+        body = build(dept)
+        try:
+            if calcache.generation() == gen:   # don't cache a feed built across a write
+                r.set(key, body, ex=FEED_TTL_SECONDS)
+        except redis.RedisError:
+            pass
+    return body
@@ -0,0 +1,260 @@
+# backend/api/indexes.py
+"""
+Declarative index registry.
+
+Every index an endpoint relies on is listed in INDEXES, keyed by collection.
+ensure_indexes() builds whatever is missing and verifies that indexes already
+present have the same key and options; a mismatch, or an index that cannot
+be built (e.g. duplicate values under a unique key), is drift and raises
+IndexDriftError. The app applies the registry on its first request rather
+than in create_app(), so `flask indexes check` still runs against a drifted
+database; with INDEXES_FAIL_FAST every request then gets a 503 until fixed.
+
+A live index is matched by name, or else by key pattern: an index with the
+same key and options under another name (e.g. Mongo's default "username_1")
+satisfies the spec as is. A same-key index with other options is drift, unless
+its name is listed in the spec's `replaces`, in which case ensure_indexes()
+drops it and builds the registry version.
+"""
+
+import threading
+
+import click
+from flask import current_app, jsonify
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from .. import db
+
+
+class IndexDriftError(RuntimeError):
+    """An existing index does not match its registry definition."""
+
+
+def _spec(keys, name, replaces=(), **options):
+    return {"keys": list(keys), "name": name, "replaces": tuple(replaces), "options": options}
+
+
+# collection -> list of index specs
+INDEXES = {
+    "pub_req": [
+        # pubreqfetch: optional status filter + sort on (start_at, _id)
+        _spec([("status", ASCENDING), ("start_at", DESCENDING), ("_id", DESCENDING)],
+              "status_start_at_id"),
+        _spec([("start_at", DESCENDING), ("_id", DESCENDING)], "start_at_id"),
+        # pubreqfetch dept filter on the flat departments array (multikey, api/departments.py)
+        _spec([("departments", ASCENDING), ("start_at", DESCENDING), ("_id", DESCENDING)],
+              "departments_start_at_id"),
+        # pubreqfetch token/prefix search (api/search.py)
+        _spec([("search_terms", ASCENDING)], "search_terms"),
+    ],
+    "events": [
+        # eventcreate idempotency: one event per source request
+        # (older deployments created a non-partial "source_request_id_1" by hand)
+        _spec([("source_request_id", ASCENDING)], "source_request_id_unique",
+              replaces=("source_request_id_1",),
+              unique=True,
+              partialFilterExpression={"source_request_id": {"$exists": True}}),
+        # calendar / eventfetch overlap range: week buckets narrow it to the window
+        # (api/timefields.py); start_at_end_at serves exports and wide windows
+        _spec([("week_buckets", ASCENDING), ("start_at", ASCENDING)], "week_buckets_start_at"),
+        _spec([("start_at", ASCENDING), ("end_at", ASCENDING)], "start_at_end_at"),
+        # per-department iCalendar feed (api/ical.py)
+        _spec([("departments", ASCENDING)], "departments"),
+    ],
+    "email_outbox": [
+        # outbox workers claim the oldest due message (api/outbox.py)
+        _spec([("status", ASCENDING), ("next_attempt_at", ASCENDING)], "status_next_attempt_at"),
+    ],
+    "users": [
+        # login / register uniqueness (auth.init_user_collection used to create
+        # these as "username_1" / "email_1"; those are matched by key)
+        _spec([("username", ASCENDING)], "username_unique", unique=True),
+        _spec([("email", ASCENDING)], "email_unique", unique=True),
+        # "signups_event_id" indexed the legacy users.signups arrays; it stays until
+        # the signups migration drops it (api/signups.py LEGACY_INDEXES)
+    ],
+    "signups": [
+        # register_event / unregister_event: one signup per (event, user)
+        _spec([("event_id", ASCENDING), ("user_id", ASCENDING)], "event_id_user_id_unique", unique=True),
+        _spec([("user_id", ASCENDING)], "user_id"),
+    ],
+}
+
+# index options we compare when checking for drift
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+# -----------------------
+# Helpers
+# -----------------------
+
+def _key_of(info):
+    return [(k, int(v) if isinstance(v, (int, float)) else v) for k, v in info["key"].items()]
+
+def _options_of(info):
+    return {k: info[k] for k in _COMPARED_OPTIONS if k in info and info[k] not in (None, False)}
+
+def _wanted_options(spec):
+    return {k: v for k, v in spec["options"].items() if k in _COMPARED_OPTIONS and v not in (None, False)}
+
+def _existing(coll):
+    try:
+        return coll.index_information()
+    except OperationFailure:
+        return {}  # collection does not exist yet
+
+def _same_options(info, spec):
+    return _options_of(info) == _wanted_options(spec)
+
+def _match_live(spec, live):
+    """(name, info) of the live index serving spec: same name, else same key pattern."""
+    info = live.get(spec["name"])
+    if info is not None:
+        return spec["name"], info
+    same_key = [(n, i) for n, i in live.items() if _key_of(i) == spec["keys"]]
+    for name, info in same_key:
+        if _same_options(info, spec):
+            return name, info
+    return same_key[0] if same_key else (None, None)
+
+def _normalize_existing(raw):
+    out = {}
+    for name, info in raw.items():
+        info = dict(info)
+        info["key"] = dict(info["key"])
+        out[name] = info
+    return out
+
+# -----------------------
+# Public API
+# -----------------------
+
+def check_indexes(database=None):
+    """
+    Compare the registry against the live database.
+    Returns {collection: {"missing": [...], "drift": [...], "unused": [...], "extra": [...]}}.
+    "unused" lists registry indexes with zero ops in $indexStats (since last restart);
+    "extra" lists live indexes the registry does not know about.
+    """
+    database = database if database is not None else db
+    report = {}
+    for coll_name, specs in INDEXES.items():
+        coll = database[coll_name]
+        live = _normalize_existing(_existing(coll))
+        entry = {"missing": [], "drift": [], "unused": [], "extra": []}
+
+        known = {"_id_"}
+        for spec in specs:
+            name, info = _match_live(spec, live)
+            if info is None:
+                entry["missing"].append(spec["name"])
+                continue
+            known.add(name)
+            if _key_of(info) != spec["keys"] or not _same_options(info, spec):
+                entry["drift"].append(spec["name"] if name == spec["name"] else f"{spec['name']} (as {name})")
+
+        entry["extra"] = sorted(n for n in live if n not in known)
+
+        try:
+            for stat in coll.aggregate([{"$indexStats": {}}]):
+                if stat.get("name") in known and stat.get("name") != "_id_" \
+                        and int((stat.get("accesses") or {}).get("ops", 0)) == 0:
+                    entry["unused"].append(stat["name"])
+        except OperationFailure:
+            pass  # $indexStats unavailable (e.g. missing privilege); skip usage report
+
+        entry["unused"].sort()
+        report[coll_name] = entry
+    return report
+
+
+def ensure_indexes(database=None, fail_fast=True):
+    """
+    Create every registry index that is missing, then verify.
+    Raises IndexDriftError on drift (or on anything still missing) when fail_fast is set.
+    Returns the check_indexes() report; an index that could not be built is listed
+    under drift as "name (create failed: reason)".
+    """
+    database = database if database is not None else db
+    failed = {}
+    for coll_name, specs in INDEXES.items():
+        coll = database[coll_name]
+        live = _normalize_existing(_existing(coll))
+        for spec in specs:
+            name, info = _match_live(spec, live)
+            try:
+                if info is not None and name != spec["name"] and name in spec["replaces"] \
+                        and not _same_options(info, spec):
+                    if current_app:
+                        current_app.logger.warning("replacing index %s.%s with %s", coll_name, name, spec["name"])
+                    coll.drop_index(name)
+                    info = None
+                if info is not None:
+                    continue   # present (possibly under another name); check_indexes() reports drift
+                coll.create_index(spec["keys"], name=spec["name"], **spec["options"])
+            except OperationFailure as e:   # includes DuplicateKeyError on a new unique index
+                reason = (e.details or {}).get("errmsg") or str(e)
+                failed.setdefault(coll_name, []).append(f"{spec['name']} (create failed: {reason})")
+
+    report = check_indexes(database)
+    for coll_name, entries in failed.items():
+        report[coll_name]["drift"].extend(entries)
+    problems = {
+        c: {"missing": r["missing"], "drift": r["drift"]}
+        for c, r in report.items() if r["missing"] or r["drift"]
+    }
+    if problems and fail_fast:
+        raise IndexDriftError(f"index registry mismatch: {problems}")
+    return report
+
+
+def _ensure_for_app(app):
+    """ensure_indexes() per the app config; returns the drift message to serve 503s with, or None."""
+    if not app.config.get("INDEXES_ENSURE_ON_STARTUP", True):
+        return None
+    try:
+        with app.app_context():
+            ensure_indexes(fail_fast=app.config.get("INDEXES_FAIL_FAST", True))
+    except IndexDriftError as e:
+        app.logger.error("%s (run `flask indexes check`)", e)
+        return str(e)
+    return None
+
+def init_app(app):
+    """Register the `flask indexes` CLI group; the registry is applied on the first request."""
+
+    @app.cli.group("indexes")
+    def indexes_cli():
+        """Manage MongoDB indexes."""
+
+    @indexes_cli.command("ensure")
+    def ensure_cmd():
+        """Build and verify every registry index."""
+        report = ensure_indexes(fail_fast=True)
+        _print_report(report)
+
+    @indexes_cli.command("check")
+    def check_cmd():
+        """Report missing, drifted, unused and unknown indexes without changing anything."""
+        report = check_indexes()
+        _print_report(report)
+        if any(r["missing"] or r["drift"] for r in report.values()):
+            raise SystemExit(1)
+
+    ensure_lock = threading.Lock()
+
+    @app.before_request
+    def _ensure_indexes_once():
+        if "indexes_drift" not in app.extensions:
+            with ensure_lock:
+                if "indexes_drift" not in app.extensions:
+                    app.extensions["indexes_drift"] = _ensure_for_app(app)
+        if app.extensions["indexes_drift"]:
+            return jsonify({"error": "index_drift", "message": "database indexes do not match the registry"}), 503
+
+
+def _print_report(report):
+    for coll_name, r in report.items():
+        click.echo(f"{coll_name}:")
+        for key in ("missing", "drift", "unused", "extra"):
+            click.echo(f"  {key}: {', '.join(r[key]) or '-'}")
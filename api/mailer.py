@@ -0,0 +1,224 @@
+# backend/api/mailer.py
+"""
+Pooled SMTP transport on top of Flask-Mail.
+
+Flask-Mail's mail.send() opens and closes an SMTP session per message. The pool
+keeps up to MAIL_POOL_SIZE open flask_mail Connection objects (the same object
+mail.connect() yields in batch mode) and reuses them across sends. Connections
+idle longer than MAIL_POOL_IDLE_SECONDS are recycled before use, and a send that
+fails on a dropped session is retried once on a fresh connection. Every SMTP
+socket gets MAIL_TIMEOUT seconds per operation (Flask-Mail sets no timeout).
+
+    from .mailer import send, send_bulk
+    send(msg)                       # one message, pooled connection
+    results = send_bulk(messages)   # [(ok, error_or_None), ...] in input order
+    send_bulk(messages, before_send=lambda i: still_wanted(i))   # False skips message i
+"""
+
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from flask_mail import Connection
+
+DEFAULT_POOL_SIZE = 3
+DEFAULT_IDLE_SECONDS = 60
+DEFAULT_TIMEOUT_SECONDS = 30
+SKIPPED = "skipped by before_send"
+
+# errors after which the session is unusable and is reopened
+_RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class _TimeoutConnection(Connection):
+    """flask_mail Connection whose SMTP session has a socket timeout."""
+
+    def __init__(self, state, timeout):
+        super().__init__(state)
+        self.timeout = timeout
+
+    def configure_host(self):
+        m = self.mail
+        smtp = smtplib.SMTP_SSL if m.use_ssl else smtplib.SMTP
+        host = smtp(m.server, m.port, timeout=self.timeout)
+        host.set_debuglevel(int(m.debug))
+        if m.use_tls:
+            host.starttls()
+        if m.username and m.password:
+            host.login(m.username, m.password)
+        return host
+
+
+class _PooledConnection:
+    def __init__(self, timeout):
+        self.conn = None
+        self.last_used = 0.0
+        self.timeout = timeout
+
+    def open(self):
+        self.conn = _TimeoutConnection(current_app.extensions["mail"], self.timeout)
+        self.conn.__enter__()
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.__exit__(None, None, None)
+            except Exception:
+                pass
+        self.conn = None
+
+
+class SMTPPool:
+    def __init__(self, app, size=DEFAULT_POOL_SIZE, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 timeout=DEFAULT_TIMEOUT_SECONDS):
+        self.app = app
+        self.size = max(int(size), 1)
+        self.idle_seconds = idle_seconds
+        self._free = queue.LifoQueue()
+        for _ in range(self.size):
+            self._free.put(_PooledConnection(timeout))
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "sent": 0,
+            "failed": 0,
+            "connections_opened": 0,
+            "reconnects": 0,
+            "send_seconds": 0.0,
+        }
+
+    def _bump(self, **kw):
+        with self._lock:
+            for k, v in kw.items():
+                self._stats[k] += v
+
+    def _ready(self, pc):
+        """Make sure pc has a live session."""
+        if pc.conn is not None and time.monotonic() - pc.last_used > self.idle_seconds:
+            pc.close()
+        if pc.conn is None:
+            pc.open()
+            self._bump(connections_opened=1)
+
+    def _send_on(self, pc, msg):
+        self._ready(pc)
+        try:
+            pc.conn.send(msg)
+        except _RECONNECT_ERRORS:
+            pc.close()
+            self._bump(reconnects=1)
+            self._ready(pc)
+            pc.conn.send(msg)
+        pc.last_used = time.monotonic()
+
+    def _run(self, messages, before_send=None):
+        """Send (index, message) pairs over one pooled connection; per-message (ok, error)."""
+        pc = self._free.get()
+        results = []
+        try:
+            with self.app.app_context():
+                for i, msg in messages:
+                    if before_send is not None and not before_send(i):
+                        results.append((False, SKIPPED))
+                        continue
+                    started = time.perf_counter()
+                    try:
+                        self._send_on(pc, msg)
+                        results.append((True, None))
+                        self._bump(sent=1, send_seconds=time.perf_counter() - started)
+                    except Exception as e:
+                        pc.close()
+                        results.append((False, f"{type(e).__name__}: {e}"))
+                        self._bump(failed=1, send_seconds=time.perf_counter() - started)
+        finally:
+            self._free.put(pc)
+        return results
+
+    def send(self, msg):
+        """Send one message; raises on failure like mail.send()."""
+        pc = self._free.get()
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                self._send_on(pc, msg)
+            self._bump(sent=1, send_seconds=time.perf_counter() - started)
+        except Exception:
+            pc.close()
+            self._bump(failed=1, send_seconds=time.perf_counter() - started)
+            raise
+        finally:
+            self._free.put(pc)
+
+    def send_bulk(self, messages, before_send=None):
+        """
+        Spread messages over the pool, many per connection. Results keep input order.
+        before_send(i), if given, runs on the lane right before message i is sent;
+        a false return skips it with result (False, SKIPPED).
+        """
+        messages = list(enumerate(messages))
+        if not messages:
+            return []
+        lanes = min(self.size, len(messages))
+        chunks = [messages[i::lanes] for i in range(lanes)]
+        with ThreadPoolExecutor(max_workers=lanes) as ex:
+            lane_results = list(ex.map(lambda chunk: self._run(chunk, before_send), chunks))
+        results = [None] * len(messages)
+        for lane, res in enumerate(lane_results):
+            for j, r in enumerate(res):
+                results[lane + j * lanes] = r
+        return results
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        s["pool_size"] = self.size
+        s["idle_connections"] = self._free.qsize()
+        done = s["sent"] + s["failed"]
+        s["avg_send_ms"] = round(1000 * s["send_seconds"] / done, 2) if done else None
+        s["messages_per_second"] = round(s["sent"] / s["send_seconds"], 2) if s["send_seconds"] else None
+        s["send_seconds"] = round(s["send_seconds"], 3)
+        return s
+
+    def close(self):
+        while True:
+            try:
+                pc = self._free.get_nowait()
+            except queue.Empty:
+                break
+            pc.close()
+
+
+# -----------------------
+# Module API
+# -----------------------
+
+_pool_lock = threading.Lock()
+
+def get_pool(app=None) -> SMTPPool:
+    app = app or current_app._get_current_object()
+    pool = app.extensions.get("smtp_pool")
+    if pool is None:
+        with _pool_lock:
+            pool = app.extensions.get("smtp_pool")
+            if pool is None:
+                pool = SMTPPool(
+                    app,
+                    size=app.config.get("MAIL_POOL_SIZE", DEFAULT_POOL_SIZE),
+                    idle_seconds=app.config.get("MAIL_POOL_IDLE_SECONDS", DEFAULT_IDLE_SECONDS),
+                    timeout=app.config.get("MAIL_TIMEOUT", DEFAULT_TIMEOUT_SECONDS),
+                )
+                app.extensions["smtp_pool"] = pool
+    return pool
+
+def send(msg):
+    get_pool().send(msg)
+
+def send_bulk(messages, before_send=None):
+    return get_pool().send_bulk(messages, before_send)
+
+def stats():
+    return get_pool().stats()
@@ -0,0 +1,164 @@
+# backend/api/metrics.py
+"""
+Per-endpoint request metrics in Prometheus text format (GET /metrics).
+
+Recorded per (method, route rule), so /api/req/attachments/<file_id> is one
+series rather than one per id:
+  http_requests_total{method,route,status}        counter
+  http_request_duration_seconds{method,route}     histogram
+  http_request_size_bytes{method,route}           histogram (request body)
+  http_response_size_bytes{method,route}          histogram (when the length is known)
+  http_requests_in_flight{method,route}           gauge
+  http_response_stream_seconds{method,route}      histogram (streamed responses)
+
+Values live in this worker process only (scrape each worker, or aggregate
+upstream). Recording is a dict lookup and a few increments under one lock.
+Duration is measured in after_request and covers the view and the other
+after_request hooks, never the body. A streamed body (exports, imports,
+attachments) is recorded separately, from before_request until the server
+closes the response, in http_response_stream_seconds.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+UNMATCHED = "<unmatched>"
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "total", "n")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot is +Inf
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.n += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}      # (method, route, status) -> count
+        self.latency = {}       # (method, route) -> _Histogram
+        self.req_size = {}
+        self.resp_size = {}
+        self.stream = {}        # (method, route) -> _Histogram, streamed bodies only
+        self.in_flight = {}     # (method, route) -> gauge
+
+    def start(self, key):
+        with self._lock:
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def finish(self, key, status, seconds, req_bytes, resp_bytes):
+        with self._lock:
+            self.in_flight[key] -= 1
+            rkey = (*key, status)
+            self.requests[rkey] = self.requests.get(rkey, 0) + 1
+            self._hist(self.latency, key, LATENCY_BUCKETS).observe(seconds)
+            if req_bytes is not None:
+                self._hist(self.req_size, key, SIZE_BUCKETS).observe(req_bytes)
+            if resp_bytes is not None:
+                self._hist(self.resp_size, key, SIZE_BUCKETS).observe(resp_bytes)
+
+    def finish_stream(self, key, seconds):
+        with self._lock:
+            self._hist(self.stream, key, LATENCY_BUCKETS).observe(seconds)
+
+    @staticmethod
+    def _hist(table, key, bounds):
+        h = table.get(key)
+        if h is None:
+            h = table[key] = _Histogram(bounds)
+        return h
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            lines += _header("http_requests_total", "counter", "Requests by route and status.")
+            for (method, route, status), n in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{_labels(method, route)},status="{status}"}} {n}')
+            lines += _header("http_requests_in_flight", "gauge", "Requests currently being handled.")
+            for (method, route), n in sorted(self.in_flight.items()):
+                lines.append(f"http_requests_in_flight{{{_labels(method, route)}}} {n}")
+            for name, table, help_text in (
+                ("http_request_duration_seconds", self.latency, "Time spent handling the request."),
+                ("http_request_size_bytes", self.req_size, "Request body size."),
+                ("http_response_size_bytes", self.resp_size, "Response body size (when known)."),
+                ("http_response_stream_seconds", self.stream, "Time until a streamed body was fully sent."),
+            ):
+                lines += _header(name, "histogram", help_text)
+                for (method, route), h in sorted(table.items()):
+                    lines += _histogram_lines(name, _labels(method, route), h)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(method, route) -> str:
+    return f'method="{method}",route="{_escape(route)}"'
+
+def _header(name, kind, help_text):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+def _histogram_lines(name, labels, h):
+    out, cumulative = [], 0
+    for bound, count in zip(h.bounds, h.counts):
+        cumulative += count
+        out.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    out.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.n}')
+    out.append(f"{name}_sum{{{labels}}} {h.total:.6f}")
+    out.append(f"{name}_count{{{labels}}} {h.n}")
+    return out
+
+# -----------------------
+# Flask hooks
+# -----------------------
+
+def _route_key():
+    rule = request.url_rule
+    return request.method, rule.rule if rule is not None else UNMATCHED
+
+def init_app(app):
+    """Register the timing hooks (first, so they wrap the role guard) and GET /metrics."""
+    registry = app.extensions["metrics"] = Registry()
+
+    @app.before_request
+    def _metrics_start():
+        key = _route_key()
+        g._metrics = (key, time.perf_counter())
+        registry.start(key)
+
+    @app.after_request
+    def _metrics_finish(response):   # registered first, so it runs after the other after_request hooks
+        started = g.pop("_metrics", None)
+        if started is None:
+            return response
+        key, t0 = started
+        registry.finish(key, response.status_code, time.perf_counter() - t0,
+                        request.content_length, response.content_length)
+        if response.is_streamed:
+            response.call_on_close(lambda: registry.finish_stream(key, time.perf_counter() - t0))
+        return response
+
+    @app.teardown_request
+    def _metrics_abort(exc):
+        # after_request never ran (the request failed outside the error handlers)
+        started = g.pop("_metrics", None)
+        if started is not None:
+            key, t0 = started
+            registry.finish(key, 500, time.perf_counter() - t0, request.content_length, None)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,66 @@
+# backend/api/migrations.py
+"""
+Bookkeeping for online data migrations.
+
+Each backfill records {_id, done, finished_at, ...} in db.migrations when it
+completes. Read paths ask is_done() whether they still need their legacy
+fallbacks; the answer is cached per process for STATE_TTL_SECONDS so hot
+endpoints don't query db.migrations on every request.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from pymongo.errors import OperationFailure
+
+from .. import db
+
+STATE_TTL_SECONDS = 60     # how long a "still migrating" answer is trusted
+
+_state = {}
+
+
+def is_done(migration_id: str) -> bool:
+    state = _state.setdefault(migration_id, {"done": False, "checked": 0.0})
+    if state["done"]:
+        return True
+    now = time.monotonic()
+    if now - state["checked"] > STATE_TTL_SECONDS:
+        state["checked"] = now
+        mig = db.migrations.find_one({"_id": migration_id}, {"done": 1}) or {}
+        state["done"] = bool(mig.get("done"))
+    return state["done"]
+
+def mark_done(migration_id: str, database=None, **extra):
+    database = database if database is not None else db
+    database.migrations.update_one(
+        {"_id": migration_id},
+        {"$set": {"done": True, "finished_at": datetime.now(timezone.utc), **extra}},
+        upsert=True,
+    )
+    _state[migration_id] = {"done": True, "checked": time.monotonic()}
+
+def drop_legacy_indexes(legacy_indexes: dict, database=None):
+    """Drop {collection: (index name, ...)} once a migration no longer needs them; missing ones are skipped."""
+    database = database if database is not None else db
+    for name, index_names in legacy_indexes.items():
+        for index_name in index_names:
+            try:
+                database[name].drop_index(index_name)
+            except OperationFailure:
+                pass   # already gone
+
+def run_in_background(app, name: str, fn):
+    """Run fn() once in a daemon thread inside an app context; failures are logged and retried on next start."""
+    def target():
+        try:
+            with app.app_context():
+                result = fn()
+                app.logger.info("%s backfill finished: %s", name, result)
+        except Exception as e:
+            app.logger.warning("%s backfill failed (will retry on next start): %s", name, e)
+
+    thread = threading.Thread(target=target, name=f"{name}-backfill", daemon=True)
+    thread.start()
+    return thread
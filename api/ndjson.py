@@ -0,0 +1,42 @@
+# backend/api/ndjson.py
+"""
+Streaming NDJSON responses for the bulk import endpoints.
+
+An import reads request.stream and writes to Mongo from inside the response
+generator, so by the time most of its work runs the 200 and headers are gone.
+ndjson_response() runs the generator up to its first line before the response
+starts: anything that fails there (PasswordBusy on the first batch, a Mongo
+error) still goes through the app's error handlers and gets a real status.
+A failure after that ends the body with an {"error", "message"} record
+instead of silently truncating it.
+"""
+
+import json
+
+from flask import Response, current_app, request, stream_with_context
+
+from . import passwords
+
+
+def _line(obj) -> str:
+    return json.dumps(obj) + "\n"
+
+
+def ndjson_response(lines):
+    lines = iter(lines)
+    first = next(lines, None)
+
+    def generate():
+        if first is None:
+            return
+        yield first
+        try:
+            yield from lines
+        except passwords.PasswordBusy:
+            retry_after = int(current_app.config.get("PASSWORD_RETRY_AFTER", passwords.DEFAULT_RETRY_AFTER))
+            yield _line({"error": "busy", "message": "Server busy, please retry", "retry_after": retry_after})
+        except Exception as e:
+            current_app.logger.exception("%s stream failed", request.path)
+            yield _line({"error": "server_error", "message": str(e)})
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
@@ -0,0 +1,281 @@
+# backend/api/outbox.py
+"""
+Persistent email outbox.
+
+Endpoints enqueue a message document into db.email_outbox and return at once;
+background workers claim up to DELIVER_BATCH due messages atomically, deliver
+them together through the pooled SMTP transport (mailer.send_bulk, many
+messages per connection) and retry failures with exponential backoff until
+MAX_ATTEMPTS, after which the message is dead-lettered (status "dead").
+
+A claimed message has status "sending" and its next_attempt_at pushed out by
+LEASE_SECONDS, so a worker that dies mid-send releases the message once the
+lease expires. The lease is renewed right before each message of a batch is
+sent; a message whose lease was taken over by another worker is skipped.
+Every claim counts as an attempt, and the claimed attempts value identifies
+the claim: renewals and outcomes only apply while it still matches, so a slow
+worker never overwrites a newer claim. A message whose worker keeps dying is
+dead-lettered like one that keeps failing.
+
+In-process workers start with the first request the app serves, so `flask`
+CLI commands (including `flask outbox work`) don't spawn them.
+"""
+
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+
+import click
+from bson import ObjectId
+from flask_mail import Message
+from pymongo import ReturnDocument
+
+from .. import db
+from . import mailer
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 15 * 60
+LEASE_SECONDS = 120
+POLL_INTERVAL_SECONDS = 2.0
+DELIVER_BATCH = 20      # messages a worker claims per round
+
+# queued -> sending -> sent
+#                   -> queued (retry) ... -> dead
+STATUSES = {"queued", "sending", "sent", "dead"}
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+def _iso(dt):
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat().replace("+00:00", "Z")
+
+def _backoff(attempts: int) -> float:
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+# -----------------------
+# Queue operations
+# -----------------------
+
+def _queued(subject, recipients, body=None, html=None, sender=None, now=None) -> dict:
+    return {
+        "subject": subject,
+        "recipients": list(recipients),
+        "body": body,
+        "html": html,
+        "sender": sender,
+        "status": "queued",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now,
+        "last_error": None,
+    }
+
+def enqueue(subject, recipients, body=None, html=None, sender=None, database=None) -> ObjectId:
+    """Persist a message for background delivery and return its id."""
+    database = database if database is not None else db
+    res = database.email_outbox.insert_one(_queued(subject, recipients, body, html, sender, _now()))
+    return res.inserted_id
+
+def enqueue_many(messages, database=None) -> list:
+    """enqueue() for many messages (dicts of enqueue()'s keyword arguments) in one insert; ids in input order."""
+    database = database if database is not None else db
+    now = _now()
+    docs = [_queued(now=now, **m) for m in messages]
+    if not docs:
+        return []
+    return database.email_outbox.insert_many(docs).inserted_ids
+
+def dead_letter_expired(database=None) -> int:
+    """Dead-letter expired leases that already used every attempt (the worker died each time)."""
+    database = database if database is not None else db
+    now = _now()
+    return database.email_outbox.update_many(
+        {"status": "sending", "next_attempt_at": {"$lte": now}, "attempts": {"$gte": MAX_ATTEMPTS}},
+        {"$set": {"status": "dead", "last_error": "lease expired (worker stopped mid-send)", "updated_at": now}},
+    ).modified_count
+
+def claim(database=None):
+    """
+    Atomically take the oldest due message (or an expired lease), or None. Counts an
+    attempt. Leases that are out of attempts are left to dead_letter_expired().
+    """
+    database = database if database is not None else db
+    now = _now()
+    return database.email_outbox.find_one_and_update(
+        {"status": {"$in": ["queued", "sending"]}, "next_attempt_at": {"$lte": now},
+         "attempts": {"$lt": MAX_ATTEMPTS}},
+        {"$set": {
+            "status": "sending",
+            "next_attempt_at": now + timedelta(seconds=LEASE_SECONDS),
+            "updated_at": now,
+        },
+         "$inc": {"attempts": 1}},
+        sort=[("next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+def claim_many(limit=DELIVER_BATCH, database=None) -> list:
+    """One worker round: dead-letter exhausted leases once, then claim() up to limit messages."""
+    dead_letter_expired(database)
+    jobs = []
+    while len(jobs) < limit:
+        job = claim(database)
+        if job is None:
+            break
+        jobs.append(job)
+    return jobs
+
+def _claimed(job) -> dict:
+    """Filter matching this claim of the message only (each claim bumps attempts)."""
+    return {"_id": job["_id"], "status": "sending", "attempts": job.get("attempts", 0)}
+
+def _renew(job, database) -> bool:
+    """Extend the lease before sending; False when another worker has re-claimed the message."""
+    now = _now()
+    res = database.email_outbox.update_one(_claimed(job), {"$set": {
+        "next_attempt_at": now + timedelta(seconds=LEASE_SECONDS),
+        "updated_at": now,
+    }})
+    return res.matched_count == 1
+
+def _settle(job, error, database):
+    """Record the outcome of one send (error None = sent); returns the resulting status, None if the claim was lost."""
+    if error is not None:
+        attempts = int(job.get("attempts", 0))   # claim() already counted this one
+        now = _now()
+        dead = attempts >= MAX_ATTEMPTS
+        res = database.email_outbox.update_one(_claimed(job), {"$set": {
+            "status": "dead" if dead else "queued",
+            "next_attempt_at": now if dead else now + timedelta(seconds=_backoff(attempts)),
+            "last_error": error,
+            "updated_at": now,
+        }})
+        return ("dead" if dead else "queued") if res.matched_count else None
+
+    now = _now()
+    res = database.email_outbox.update_one(_claimed(job), {"$set": {
+        "status": "sent",
+        "sent_at": now,
+        "last_error": None,
+        "updated_at": now,
+    }})
+    return "sent" if res.matched_count else None
+
+def deliver_many(jobs, database=None) -> list:
+    """
+    Send claimed messages with mailer.send_bulk, renewing each lease just before its
+    send; returns their resulting statuses (None where the claim was lost).
+    """
+    database = database if database is not None else db
+    lost = set()
+
+    def before_send(i):
+        if _renew(jobs[i], database):
+            return True
+        lost.add(i)
+        return False
+
+    results = mailer.send_bulk((Message(
+        subject=job.get("subject"),
+        recipients=job.get("recipients") or [],
+        body=job.get("body"),
+        html=job.get("html"),
+        sender=job.get("sender"),
+    ) for job in jobs), before_send=before_send)
+    return [None if i in lost else _settle(job, error, database)
+            for i, (job, (_ok, error)) in enumerate(zip(jobs, results))]
+
+def drain(limit=None) -> int:
+    """Deliver due messages in the current app context until none are left (or limit)."""
+    n = 0
+    while limit is None or n < limit:
+        jobs = claim_many(DELIVER_BATCH if limit is None else min(DELIVER_BATCH, limit - n))
+        if not jobs:
+            break
+        deliver_many(jobs)
+        n += len(jobs)
+    return n
+
+def status_of(message_id):
+    """Public view of a message's delivery state, or None."""
+    doc = db.email_outbox.find_one({"_id": message_id}, {
+        "status": 1, "attempts": 1, "recipients": 1, "last_error": 1,
+        "created_at": 1, "sent_at": 1, "next_attempt_at": 1,
+    })
+    if not doc:
+        return None
+    return {
+        "id": str(doc["_id"]),
+        "status": doc.get("status"),
+        "attempts": doc.get("attempts", 0),
+        "recipients": doc.get("recipients") or [],
+        "last_error": doc.get("last_error"),
+        "created_at": _iso(doc.get("created_at")),
+        "sent_at": _iso(doc.get("sent_at")),
+        "next_attempt_at": _iso(doc.get("next_attempt_at")) if doc.get("status") == "queued" else None,
+    }
+
+# -----------------------
+# Workers
+# -----------------------
+
+def _worker_loop(app, stop):
+    while not stop.is_set():
+        try:
+            with app.app_context():
+                jobs = claim_many()
+                if jobs:
+                    deliver_many(jobs)
+                    continue
+        except Exception as e:  # keep the worker alive across transient DB errors
+            app.logger.warning("email outbox worker error: %s", e)
+        stop.wait(POLL_INTERVAL_SECONDS)
+
+def start_workers(app, count: int):
+    """Start `count` daemon worker threads; returns the stop event."""
+    stop = threading.Event()
+    for i in range(count):
+        t = threading.Thread(target=_worker_loop, args=(app, stop), name=f"email-outbox-{i}", daemon=True)
+        t.start()
+    return stop
+
+def init_app(app):
+    """Register the `flask outbox` CLI group; in-process workers (EMAIL_OUTBOX_WORKERS) start on the first request."""
+
+    @app.cli.group("outbox")
+    def outbox_cli():
+        """Email outbox delivery."""
+
+    @outbox_cli.command("drain")
+    def drain_cmd():
+        """Deliver every due message once and exit."""
+        click.echo(f"processed {drain()} messages")
+
+    @outbox_cli.command("work")
+    @click.option("--workers", default=2, show_default=True)
+    def work_cmd(workers):
+        """Run delivery workers in the foreground."""
+        stop = start_workers(app, workers)
+        try:
+            stop.wait()
+        except KeyboardInterrupt:
+            stop.set()
+
+    start_lock = threading.Lock()
+
+    @app.before_request
+    def _start_outbox_workers():
+        if "email_outbox_stop" in app.extensions:
+            return
+        with start_lock:
+            count = int(app.config.get("EMAIL_OUTBOX_WORKERS", 0))
+            if "email_outbox_stop" not in app.extensions:
+                app.extensions["email_outbox_stop"] = start_workers(app, count) if count > 0 else None
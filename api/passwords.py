@@ -0,0 +1,134 @@
+# backend/api/passwords.py
+"""
+Bounded worker pool for bcrypt.
+
+bcrypt releases the GIL, so a small thread pool runs hashes in parallel while
+capping how many can be in flight. When PASSWORD_WORKERS + PASSWORD_QUEUE_DEPTH
+jobs are already admitted, new work fails fast with PasswordBusy, which the app
+turns into `503 Retry-After` instead of letting requests pile up on CPU.
+
+BCRYPT_ROUNDS sets the cost for new hashes; needs_rehash() tells login when a
+stored hash was made with a different cost so it can be upgraded transparently.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from flask import current_app, jsonify
+
+DEFAULT_ROUNDS = 12
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_DEPTH = 16
+DEFAULT_RETRY_AFTER = 2
+
+
+class PasswordBusy(RuntimeError):
+    """Password pool is saturated; retry later."""
+
+
+class _Pool:
+    def __init__(self, workers, depth, rounds):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + depth)
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordBusy("password hashing queue is full")
+        try:
+            fut = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _f: self._slots.release())
+        return fut.result()
+
+    def submit_waiting(self, fn, *args, timeout=30):
+        """Like run() but waits up to `timeout` for a slot and returns the future."""
+        if not self._slots.acquire(timeout=timeout):
+            raise PasswordBusy("password hashing queue is full")
+        try:
+            fut = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _f: self._slots.release())
+        return fut
+
+
+_pool_lock = threading.Lock()
+
+def _pool() -> _Pool:
+    app = current_app._get_current_object()
+    pool = app.extensions.get("password_pool")
+    if pool is None:
+        with _pool_lock:
+            pool = app.extensions.get("password_pool")
+            if pool is None:
+                pool = _Pool(
+                    workers=int(app.config.get("PASSWORD_WORKERS", DEFAULT_WORKERS)),
+                    depth=int(app.config.get("PASSWORD_QUEUE_DEPTH", DEFAULT_QUEUE_DEPTH)),
+                    rounds=int(app.config.get("BCRYPT_ROUNDS", DEFAULT_ROUNDS)),
+                )
+                app.extensions["password_pool"] = pool
+    return pool
+
+# -----------------------
+# bcrypt work (runs on pool threads)
+# -----------------------
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+def _check(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    except ValueError:
+        return False  # malformed / empty stored hash
+
+# -----------------------
+# Public API
+# -----------------------
+
+def hash_password(password: str) -> str:
+    pool = _pool()
+    return pool.run(_hash, password, pool.rounds)
+
+def check_password(password: str, hashed: str) -> bool:
+    return _pool().run(_check, password, hashed or "")
+
+def hash_many(plaintexts):
+    """
+    Hash a batch in parallel for bulk jobs. At most PASSWORD_WORKERS hashes are
+    admitted at a time (waiting for free slots rather than failing), so the queue
+    depth stays available to interactive logins. Results keep input order.
+    """
+    pool = _pool()
+    out, window = [], []
+    for pw in plaintexts:
+        if len(window) >= pool.workers:
+            out.append(window.pop(0).result())
+        window.append(pool.submit_waiting(_hash, pw, pool.rounds))
+    out.extend(f.result() for f in window)
+    return out
+
+def hash_cost(hashed: str):
+    """Cost factor of a '$2b$12$...' hash, or None if unparseable."""
+    try:
+        return int((hashed or "").split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed: str) -> bool:
+    return hash_cost(hashed) != _pool().rounds
+
+def init_app(app):
+    @app.errorhandler(PasswordBusy)
+    def _password_busy(_e):
+        retry_after = int(app.config.get("PASSWORD_RETRY_AFTER", DEFAULT_RETRY_AFTER))
+        resp = jsonify({"success": False, "error": "busy", "message": "Server busy, please retry"})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = str(retry_after)
+        return resp
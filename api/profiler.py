@@ -0,0 +1,203 @@
+# backend/api/profiler.py
+"""
+Opt-in request profiler.
+
+With PROFILER_ENABLED, a request is profiled when an admin sends the
+PROFILER_HEADER (default "X-Profile: 1") or when it is picked by
+PROFILER_SAMPLE_RATE (0..1). PROFILER_MODE selects:
+  sampler   a thread snapshots the request thread's stack every
+            PROFILER_INTERVAL_MS and the result is stored as collapsed stacks
+            ("frame;frame;frame count" lines, the input of flamegraph.pl /
+            speedscope);
+  cprofile  cProfile around the request, stored as a pstats dump (.prof)
+            for snakeviz / `python -m pstats`.
+Profiles go to GridFS (collection "profiles", newest PROFILER_KEEP kept) so
+every worker's output is visible from the admin endpoints under
+/api/admin/profiles. A profiled response carries X-Profile-Id.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Blueprint, current_app, g, jsonify, request
+from gridfs import GridFS
+from gridfs.errors import NoFile
+
+from .. import db
+from .guards import current_role, roles_any
+
+DEFAULT_HEADER = "X-Profile"
+DEFAULT_INTERVAL_MS = 5
+DEFAULT_KEEP = 50
+MAX_SAMPLE_STACKS = 20_000     # distinct stacks kept per profile
+
+profiles_bp = Blueprint("profiles", __name__, url_prefix="/api/admin/profiles")
+_fs = GridFS(db, collection="profiles")
+
+# -----------------------
+# Profilers
+# -----------------------
+
+class _Sampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                if key in self.counts or len(self.counts) < MAX_SAMPLE_STACKS:
+                    self.counts[key] += 1
+                self.samples += 1
+
+    def stop(self) -> bytes:
+        self._done.set()
+        self.join()
+        lines = (f"{stack} {n}" for stack, n in self.counts.most_common())
+        return "".join(line + "\n" for line in lines).encode("utf-8")
+
+
+class _CProfile:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self) -> bytes:
+        self.profile.disable()
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)   # the format pstats.Stats(path) loads
+
+# -----------------------
+# Request hooks
+# -----------------------
+
+def _wanted(app) -> bool:
+    header = app.config.get("PROFILER_HEADER", DEFAULT_HEADER)
+    if request.headers.get(header) and current_role() == "admin":
+        return True
+    rate = float(app.config.get("PROFILER_SAMPLE_RATE", 0.0))
+    return rate > 0 and random.random() < rate
+
+def _store(data: bytes, mode: str, meta: dict, profile_id):
+    filename = f"{profile_id}.{'prof' if mode == 'cprofile' else 'collapsed.txt'}"
+    _fs.put(
+        data, _id=profile_id, filename=filename,
+        content_type="application/octet-stream" if mode == "cprofile" else "text/plain",
+        metadata={"mode": mode, **meta},
+    )
+    keep = int(current_app.config.get("PROFILER_KEEP", DEFAULT_KEEP))
+    old = db["profiles.files"].find({}, {"_id": 1}).sort("uploadDate", -1).skip(keep)
+    for doc in old:
+        _fs.delete(doc["_id"])
+
+def init_app(app):
+    """Register the admin endpoints and the hooks (a config check per request while disabled)."""
+    app.register_blueprint(profiles_bp)
+
+    @app.before_request
+    def _profile_start():
+        if not app.config.get("PROFILER_ENABLED", False) or request.blueprint == profiles_bp.name \
+                or not _wanted(app):
+            return
+        mode = app.config.get("PROFILER_MODE", "sampler")
+        if mode == "cprofile":
+            profiler = _CProfile()
+        else:
+            interval = float(app.config.get("PROFILER_INTERVAL_MS", DEFAULT_INTERVAL_MS)) / 1000.0
+            profiler = _Sampler(threading.get_ident(), interval)
+            profiler.start()
+        g._profile = (ObjectId(), mode, profiler, time.perf_counter())
+
+    @app.after_request
+    def _profile_header(response):
+        prof = g.get("_profile")
+        if prof is not None:
+            response.headers["X-Profile-Id"] = str(prof[0])
+            g._profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _profile_finish(exc):
+        prof = g.pop("_profile", None)
+        if prof is None:
+            return
+        profile_id, mode, profiler, t0 = prof
+        data = profiler.stop()
+        try:
+            _store(data, mode, {
+                "method": request.method,
+                "path": request.full_path.rstrip("?"),
+                "route": request.url_rule.rule if request.url_rule else None,
+                "status": g.pop("_profile_status", 500),
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 2),
+                "samples": getattr(profiler, "samples", None),
+                "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            }, profile_id)
+        except Exception as e:
+            app.logger.warning("could not store profile %s: %s", profile_id, e)
+
+# -----------------------
+# Admin endpoints
+# -----------------------
+
+@profiles_bp.route("", methods=["GET"])
+@roles_any({"admin"})
+def list_profiles():
+    """Newest first: id, filename, size and the request metadata."""
+    items = []
+    for f in db["profiles.files"].find({}).sort("uploadDate", -1):
+        items.append({
+            "id": str(f["_id"]),
+            "filename": f.get("filename"),
+            "bytes": f.get("length"),
+            "url": f"/api/admin/profiles/{f['_id']}",
+            **(f.get("metadata") or {}),
+        })
+    return jsonify({"success": True, "items": items}), 200
+
+@profiles_bp.route("/<string:profile_id>", methods=["GET"])
+@roles_any({"admin"})
+def download_profile(profile_id):
+    try:
+        grid_out = _fs.get(ObjectId(profile_id))
+    except (NoFile, InvalidId, TypeError):
+        return jsonify({"success": False, "message": "Profile not found"}), 404
+    rv = current_app.response_class(io.BytesIO(grid_out.read()), mimetype=grid_out.content_type,
+                                    direct_passthrough=True)
+    rv.headers.set("Content-Disposition", "attachment", filename=grid_out.filename)
+    return rv
+
+@profiles_bp.route("/<string:profile_id>", methods=["DELETE"])
+@roles_any({"admin"})
+def delete_profile(profile_id):
+    try:
+        oid = ObjectId(profile_id)
+    except (InvalidId, TypeError):
+        return jsonify({"success": False, "message": "invalid id"}), 400
+    if not _fs.exists(oid):
+        return jsonify({"success": False, "message": "Profile not found"}), 404
+    _fs.delete(oid)
+    return jsonify({"success": True, "deleted": 1}), 200
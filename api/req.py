@@ -1,15 +1,23 @@
 # backend/routes/req.py
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, current_app, Response, session, stream_with_context
 from .. import db
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import wrap_file
 from gridfs import GridFS
 from gridfs.errors import NoFile
 from .guards import roles_any
+from . import calcache, departments, email_templates, ical, ndjson, outbox, search, signups, timefields
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ExecutionTimeout
 
 from datetime import datetime, timezone
-import io, json, re
+from functools import lru_cache
+import base64, csv, hashlib, io, json, re
+import redis
+from urllib.parse import quote
 from bson import ObjectId
+from bson.errors import InvalidId
 
 fs = GridFS(db)
 
@@ -64,11 +72,13 @@ except Exception:
     if STHLM is None:
         raise RuntimeError("Timezone 'Europe/Stockholm' unavailable")
 
-def _combine_utc(date_str: str, hhmm: str | None) -> str | None:
+@lru_cache(maxsize=4096)
+def _combine_utc(date_str: str, hhmm: str | None) -> datetime | None:
     """
     Treat date_str + hhmm as LOCAL time in Europe/Stockholm,
-    convert to UTC and return '...Z' ISO string.
+    convert to UTC and return an aware datetime (stored as a BSON date).
     Accepts date_str as 'YYYY-MM-DD' or ISO; ignores time part if present.
+    Memoized: imports repeat the same few dates/times many times.
     """
     s = (date_str or "").strip()
     if not s:
@@ -91,95 +101,78 @@ def _combine_utc(date_str: str, hhmm: str | None) -> str | None:
 
     # Build LOCAL Stockholm datetime, then convert to UTC
     dt_local = datetime(y, m, d, hh, mm, tzinfo=STHLM)
-    dt_utc = dt_local.astimezone(timezone.utc)
-    return dt_utc.isoformat().replace("+00:00", "Z")
+    return dt_local.astimezone(timezone.utc)
 
-def _normalize_departments(raw):
-    if raw is None:
-        return {"type": "departments", "departments": []}
-    if isinstance(raw, str):
-        try:
-            parsed = json.loads(raw)
-            if isinstance(parsed, dict) and "departments" in parsed:
-                arr = parsed.get("departments") or []
-            elif isinstance(parsed, list):
-                arr = parsed
-            else:
-                arr = [str(parsed)]
-            return {"type": "departments", "departments": arr}
-        except json.JSONDecodeError:
-            parts = [s.strip() for s in raw.split(",") if s.strip()]
-            return {"type": "departments", "departments": parts}
-    if isinstance(raw, list):
-        return {"type": "departments", "departments": raw}
-    if isinstance(raw, dict) and "departments" in raw:
-        return {"type": "departments", "departments": list(raw.get("departments") or [])}
-    return {"type": "departments", "departments": []}
+def _window_of(doc):
+    """('...Z', '...Z') calendar-cache bounds of a pub_req / event document."""
+    return timefields.doc_time(doc, "start"), timefields.doc_time(doc, "end")
 
 # -----------------------
 # Create publication request (multipart with files OR JSON)
 # -----------------------
 
+def _build_pubreq_doc(payload: dict, files_meta: list, now: str):
+    """pub_req document from a submitted payload; returns (doc, err_payload, err_code)."""
+    title = payload.get("title")
+    author = payload.get("author")
+    organization = payload.get("organization")
+    email = payload.get("email")
+    description = payload.get("description")
+    location = payload.get("_location") or payload.get("location")
+    date = payload.get("date")  # "YYYY-MM-DD" or full ISO
+    start_time = (payload.get("start_time") or "").strip()
+    end_time = (payload.get("end_time") or "").strip() or start_time
+
+    # Normalize timing (UTC datetimes)
+    if date:
+        try:
+            start_at = _combine_utc(date, start_time)
+            end_at = _combine_utc(date, end_time)
+        except ValueError as e:
+            return None, {"success": False, "message": str(e)}, 400
+        if end_at < start_at:
+            return None, {"success": False, "message": "end_time < start_time"}, 400
+    else:
+        start_at = None
+        end_at = None
+
+    doc = {
+        "title": title,
+        "author": author,
+        "organization": organization,
+        "email": email,
+        "location": location,
+        "on_campus": _to_bool(payload.get("on_campus")),
+        "max_attendees": _to_int_or_none(payload.get("max_attendees")),
+
+        # raw timing (as submitted)
+        "date": date,
+        "start_time": start_time,
+        "end_time": end_time,
+
+        # normalized timing (UTC, native dates; see api/timefields.py)
+        "start_at": start_at,
+        "end_at": end_at,
+
+        "description": description,
+        "publish_all": _to_bool(payload.get("publish_all")),
+        "departments": departments.normalize(payload.get("departments")),
+        "attachments": files_meta,
+
+        # workflow + visibility
+        "status": "pending",      # pending | approved | rejected
+        "is_visible": False,      # drives calendar display
+
+        "created_at": now,
+        "updated_at": now,
+    }
+    doc["search_terms"] = search.terms_for(doc)
+    return doc, None, None
+
 @req_bp.route("/pubreqtest", methods=["POST"])
 def pubreqtest():
     now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
-    def build_doc(payload: dict, files_meta: list):
-        title = payload.get("title")
-        author = payload.get("author")
-        organization = payload.get("organization")
-        email = payload.get("email")
-        description = payload.get("description")
-        location = payload.get("_location") or payload.get("location")
-        date = payload.get("date")  # "YYYY-MM-DD" or full ISO
-        start_time = (payload.get("start_time") or "").strip()
-        end_time = (payload.get("end_time") or "").strip() or start_time
-
-        # Normalize timing (UTC ISO)
-        if date:
-            try:
-                start_iso = _combine_utc(date, start_time)
-                end_iso = _combine_utc(date, end_time)
-            except ValueError as e:
-                return None, {"success": False, "message": str(e)}, 400
-            if end_iso < start_iso:
-                return None, {"success": False, "message": "end_time < start_time"}, 400
-        else:
-            start_iso = None
-            end_iso = None
-
-        doc = {
-            "title": title,
-            "author": author,
-            "organization": organization,
-            "email": email,
-            "location": location,
-            "on_campus": _to_bool(payload.get("on_campus")),
-            "max_attendees": _to_int_or_none(payload.get("max_attendees")),
-
-            # raw timing (as submitted)
-            "date": date,
-            "start_time": start_time,
-            "end_time": end_time,
-
-            # normalized timing (UTC)
-            "start_iso": start_iso,
-            "end_iso": end_iso,
-
-            "description": description,
-            "publish_all": _to_bool(payload.get("publish_all")),
-            "departments": _normalize_departments(payload.get("departments")),
-            "attachments": files_meta,
-
-            # workflow + visibility
-            "status": "pending",      # pending | approved | rejected
-            "is_visible": False,      # drives calendar display
-
-            "created_at": now,
-            "updated_at": now,
-        }
-        return doc, None, None
-
     # multipart/form-data
     if request.content_type and request.content_type.startswith("multipart/form-data"):
         files = request.files.getlist("attachments")
@@ -194,143 +187,415 @@ def pubreqtest():
                 "mime": f.content_type
             })
 
-        doc, err_payload, err_code = build_doc(request.form, saved_files)
+        doc, err_payload, err_code = _build_pubreq_doc(request.form, saved_files, now)
         if doc is None:
             return jsonify(err_payload), err_code
 
         res = db.pub_req.insert_one(doc)
         doc["_id"] = str(res.inserted_id)
-        return jsonify({"success": True, "message": "Publication added with files", "publication": doc}), 201
+        doc.pop("search_terms", None)
+        return jsonify({"success": True, "message": "Publication added with files", "publication": timefields.public(doc)}), 201
 
     # JSON body
     data = (request.get_json(silent=True) or {})
     if not data:
         return jsonify({"success": False, "message": "No data provided"}), 400
 
-    doc, err_payload, err_code = build_doc(data, [])
+    doc, err_payload, err_code = _build_pubreq_doc(data, [], now)
     if doc is None:
         return jsonify(err_payload), err_code
 
     res = db.pub_req.insert_one(doc)
     doc["_id"] = str(res.inserted_id)
-    return jsonify({"success": True, "message": "Publication added", "publication": doc}), 201
+    doc.pop("search_terms", None)
+    return jsonify({"success": True, "message": "Publication added", "publication": timefields.public(doc)}), 201
 
 # -----------------------
-# Fetch requests (with filters + pagination)
+# Bulk import (NDJSON, one publication request per line)
 # -----------------------
 
-@req_bp.route("/pubreqfetch", methods=["GET"])
+IMPORT_BATCH = 500
+
+@req_bp.route("/pubreqimport", methods=["POST"])
 @roles_any({"staff", "admin"})
-def pubreqfetch():
-    try:
-        dept      = request.args.get("dept")
-        status    = request.args.get("status")
-        q         = request.args.get("q")
-        page      = int(request.args.get("page", "1"))
-        page_size = max(min(int(request.args.get("page_size", "50")), 200), 1)
+def pubreq_import():
+    """
+    Body: NDJSON, one pubreqtest-style JSON object per line (no attachments).
+    Query params: dry_run=1 validates only and writes nothing.
+    Rows are normalized exactly like pubreqtest and written with insert_many in
+    batches of IMPORT_BATCH. Streams back NDJSON: one result per row, then a summary,
+    or a final {"error": ...} line if a write fails mid-stream (see api/ndjson.py).
+    """
+    dry_run = _to_bool(request.args.get("dry_run"))
+    now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    def results():
+        counts = {"valid" if dry_run else "created": 0, "invalid": 0, "error": 0}
+        batch = []
+
+        def flush():
+            failed = {}
+            try:
+                db.pub_req.insert_many([d for _, d in batch], ordered=False)
+            except BulkWriteError as e:
+                failed = {err["index"]: err.get("errmsg", "write failed") for err in e.details.get("writeErrors", [])}
+            for i, (line_no, d) in enumerate(batch):
+                if i in failed:
+                    counts["error"] += 1
+                    yield json.dumps({"row": line_no, "status": "error", "message": failed[i]}) + "\n"
+                else:
+                    counts["created"] += 1
+                    yield json.dumps({"row": line_no, "status": "created", "id": str(d["_id"])}) + "\n"
+            batch.clear()
+
+        text = io.TextIOWrapper(request.stream, encoding="utf-8-sig")
+        for line_no, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payload = json.loads(line)
+                if not isinstance(payload, dict):
+                    raise ValueError("row must be a JSON object")
+                doc, err_payload, _ = _build_pubreq_doc(payload, [], now)
+                if doc is None:
+                    raise ValueError(err_payload["message"])
+            except (ValueError, TypeError, AttributeError) as e:
+                counts["invalid"] += 1
+                msg = f"invalid JSON: {e.msg}" if isinstance(e, json.JSONDecodeError) else str(e)
+                yield json.dumps({"row": line_no, "status": "invalid", "message": msg}) + "\n"
+                continue
+
+            if dry_run:
+                counts["valid"] += 1
+                yield json.dumps({"row": line_no, "status": "valid"}) + "\n"
+                continue
+            batch.append((line_no, doc))
+            if len(batch) >= IMPORT_BATCH:
+                yield from flush()
+
+        if batch:
+            yield from flush()
+        yield json.dumps({"summary": counts, "dry_run": dry_run}) + "\n"
 
-        filt = {}
-        or_clauses = []
+    return ndjson.ndjson_response(results())
+
+# -----------------------
+# Fetch requests (with filters + pagination)
+# -----------------------
 
-        if dept and dept != "all":
-            or_clauses.extend([
-                {"departments": dept},
-                {"departments.departments": dept},
-            ])
+def _pubreq_item(doc):
+    """Serialize a pub_req document for the staff review table."""
+    # attachments → add URLs
+    attachments = []
+    for f in (doc.get("attachments") or []):
+        if isinstance(f, dict) and f.get("file_id"):
+            attachments.append({
+                "file_id": f.get("file_id"),
+                "filename": f.get("filename"),
+                "mime": f.get("mime"),
+                "url": f"/api/req/attachments/{f.get('file_id')}",
+            })
 
-        if q:
+    return {
+        "id": str(doc.get("_id")),
+        "title": doc.get("title", ""),
+        "author": doc.get("author", ""),
+        "email": doc.get("email", ""),
+        "organization": doc.get("organization", ""),
+        "location": doc.get("location", ""),
+        "description": doc.get("description", ""),
+
+        # timing (raw + normalized)
+        "date": doc.get("date", ""),
+        "start_time": doc.get("start_time", ""),
+        "end_time": doc.get("end_time", ""),
+        "start_iso": timefields.doc_time(doc, "start"),
+        "end_iso": timefields.doc_time(doc, "end"),
+
+        # flags
+        "on_campus": bool(doc.get("on_campus", False)),
+        "max_attendees": doc.get("max_attendees"),
+        "publish_all": bool(doc.get("publish_all", False)),
+        "is_visible": bool(doc.get("is_visible", False)),
+        "status": doc.get("status", "pending"),
+
+        "departments": doc.get("departments") or [],
+        "attachments": attachments,
+
+        # audit
+        "created_at": doc.get("created_at"),
+        "updated_at": doc.get("updated_at"),
+    }
+
+def _encode_cursor(doc):
+    """Opaque keyset cursor from the last row's (start_at, _id)."""
+    raw = json.dumps([timefields.to_iso(doc.get("start_at")), str(doc["_id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(token: str):
+    try:
+        pad = "=" * (-len(token) % 4)
+        start_iso, id_str = json.loads(base64.urlsafe_b64decode(token + pad).decode("utf-8"))
+        start_at = timefields.parse_iso(start_iso)
+        if start_iso is not None and start_at is None:
+            raise ValueError
+        return start_at, ObjectId(id_str)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+def _after_cursor(start_at, oid):
+    """
+    Rows strictly after (start_at, _id) in (start_at desc, _id desc) order.
+    Missing/null start_at sorts lowest, i.e. last in descending order.
+    """
+    if start_at is None:
+        return {"start_at": None, "_id": {"$lt": oid}}
+    return {"$or": [
+        {"start_at": {"$lt": start_at}},
+        {"start_at": start_at, "_id": {"$lt": oid}},
+        {"start_at": None},
+    ]}
+
+QUERY_MAX_TIME_MS = 5000  # hard cap on server time for a single listing query
+
+# fields _pubreq_item() reads; listings never load search_terms
+LIST_PROJECTION = {f: 1 for f in (
+    "title", "author", "email", "organization", "location", "description",
+    "date", "start_time", "end_time", "start_at", "end_at", "start_iso", "end_iso",
+    "on_campus", "max_attendees", "publish_all", "is_visible", "status",
+    "departments", "attachments", "created_at", "updated_at",
+)}
+
+def _pubreq_filter(args):
+    """
+    Build the pub_req filter from dept / status / q / search query args.
+    search=text (default) matches tokens and prefixes via the indexed search_terms;
+    search=regex is the legacy unanchored regex across the text fields.
+    Returns (filt, qterms, error_message); qterms is only set for text search.
+    """
+    dept   = args.get("dept")
+    status = args.get("status")
+    q      = (args.get("q") or "").strip()
+    mode   = (args.get("search") or "text").strip().lower()
+
+    filt = {}
+    or_groups = []
+    qterms = None
+
+    if dept and dept != "all":
+        dept_filt = departments.match(dept)
+        if "$or" in dept_filt:
+            or_groups.append(dept_filt["$or"])   # legacy shapes, until the migration is done
+        else:
+            filt.update(dept_filt)
+
+    if q:
+        if mode == "regex":
             try:
                 regex = re.compile(q, re.IGNORECASE)
             except re.error as e:
-                return jsonify({"error": "bad_request", "message": f"invalid query regex: {e}"}), 400
-            or_clauses.extend([
-                {"title": regex},
-                {"author": regex},
-                {"email": regex},
-                {"organization": regex},
-                {"location": regex},
-                {"description": regex},
-            ])
-
-        if or_clauses:
-            filt["$or"] = or_clauses
-
-        if status and status != "all":
-            filt["status"] = status.strip().lower()
-
-        cursor = (
-            db.pub_req.find(filt)
-            .sort([("start_iso", -1), ("_id", -1)])
-            .skip((page - 1) * page_size)
-            .limit(page_size)
+                return None, None, f"invalid query regex: {e}"
+            or_groups.append([{field: regex} for field in search.SEARCH_FIELDS])
+        elif mode == "text":
+            # a q of only 1-character tokens has nothing to match on: list unfiltered
+            qterms = search.query_terms(q) or None
+            if qterms:
+                text_filt = search.text_filter(qterms)
+                if "$or" in text_filt:
+                    or_groups.append(text_filt["$or"])   # untagged documents, until the backfill is done
+                else:
+                    filt.update(text_filt)
+        else:
+            return None, None, "search must be 'text' or 'regex'"
+
+    if len(or_groups) == 1:
+        filt["$or"] = or_groups[0]
+    elif or_groups:
+        filt["$and"] = [{"$or": g} for g in or_groups]
+
+    if status and status != "all":
+        filt["status"] = status.strip().lower()
+
+    return filt, qterms, None
+
+# -----------------------
+# Listing counts ($facet mode + short-lived count cache)
+# -----------------------
+
+COUNT_CACHE_SECONDS = 30   # default for PUBREQ_COUNT_CACHE_SECONDS (0 disables)
+
+def _count_cache_key(kind: str, filters):
+    """Redis key for cached counts, or None when the cache is disabled."""
+    if int(current_app.config.get("PUBREQ_COUNT_CACHE_SECONDS", COUNT_CACHE_SECONDS)) <= 0:
+        return None
+    if current_app.config.get("SESSION_REDIS") is None:
+        return None
+    raw = json.dumps([kind, filters], sort_keys=True, default=str).encode("utf-8")
+    return f"pubreqcount:{hashlib.sha1(raw).hexdigest()}"
+
+def _cached_counts(key):
+    """Counts stored under key, or None. Counts may lag writes by the cache TTL."""
+    if key is None:
+        return None
+    try:
+        raw = current_app.config["SESSION_REDIS"].get(key)
+        return json.loads(raw) if raw is not None else None
+    except (redis.RedisError, ValueError):
+        return None
+
+def _store_counts(key, value):
+    if key is None:
+        return
+    ttl = int(current_app.config.get("PUBREQ_COUNT_CACHE_SECONDS", COUNT_CACHE_SECONDS))
+    try:
+        current_app.config["SESSION_REDIS"].set(key, json.dumps(value), ex=ttl)
+    except redis.RedisError:
+        pass
+
+def _count_pubreqs(filt) -> int:
+    key = _count_cache_key("total", filt)
+    total = _cached_counts(key)
+    if total is None:
+        total = db.pub_req.count_documents(filt, maxTimeMS=QUERY_MAX_TIME_MS)
+        _store_counts(key, total)
+    return total
+
+def _pubreq_page(filt, qterms, after, cursor_arg, page, page_size, relevance):
+    """
+    (docs, has_more) for one listing page, as an indexed find on (start_at, _id).
+    Relevance mode ranks the newest search.MAX_CANDIDATES matches on their search
+    fields only, then loads the page's documents by id.
+    """
+    order = [("start_at", -1), ("_id", -1)]
+    if relevance:
+        candidates = list(
+            db.pub_req.find(filt, {"start_at": 1, **{f: 1 for f in search.SEARCH_FIELDS}})
+            .sort(order)
+            .limit(search.MAX_CANDIDATES)
+            .max_time_ms(QUERY_MAX_TIME_MS)
         )
+        offset = (page - 1) * page_size
+        ids = [d["_id"] for d in search.rank(candidates, qterms)[offset:offset + page_size]]
+        by_id = {d["_id"]: d for d in db.pub_req.find({"_id": {"$in": ids}}, LIST_PROJECTION)} if ids else {}
+        return [by_id[i] for i in ids if i in by_id], False
+
+    query = filt
+    if after:
+        query = {"$and": [filt, after]} if filt else after
+    cursor = db.pub_req.find(query, LIST_PROJECTION).sort(order)
+    if cursor_arg is None:
+        cursor = cursor.skip((page - 1) * page_size)
+    docs = list(cursor.limit(page_size + 1).max_time_ms(QUERY_MAX_TIME_MS))  # one extra row tells us if there is a next page
+    return docs[:page_size], len(docs) > page_size
+
+def _pubreq_faceted(args, filt, qterms, after, cursor_arg, page, page_size, relevance):
+    """
+    The page (an ordinary indexed query) plus the total and the tab counts from one
+    $facet aggregation: facets.status ignores the status filter and
+    facets.departments the dept filter, so every tab shows what selecting it would list.
+    """
+    args = dict(args.items())
+    status_filt = _pubreq_filter({**args, "status": None})[0] if args.get("status") else filt
+    dept_filt = _pubreq_filter({**args, "dept": None})[0] if args.get("dept") else filt
+
+    count_facets = {
+        "total": [{"$match": filt}, {"$count": "n"}],
+        "status": [{"$match": status_filt}, {"$group": {"_id": "$status", "n": {"$sum": 1}}}],
+        "departments": [
+            {"$match": dept_filt},
+            {"$project": {"departments": 1}},
+            {"$unwind": "$departments"},
+            {"$group": {"_id": "$departments", "n": {"$sum": 1}}},
+        ],
+    }
+    counts_key = _count_cache_key("facets", [filt, status_filt, dept_filt])
+    counts = _cached_counts(counts_key)
+    if counts is None:
+        match = filt if status_filt is filt and dept_filt is filt else {"$or": [filt, status_filt, dept_filt]}
+        out = next(db.pub_req.aggregate(
+            [{"$match": match}, {"$facet": count_facets}],
+            maxTimeMS=QUERY_MAX_TIME_MS,
+        ), {})
+        counts = {
+            "total": (out.get("total") or [{"n": 0}])[0]["n"],
+            "status": {str(row["_id"]): row["n"] for row in out.get("status", [])},
+            "departments": {str(row["_id"]): row["n"] for row in out.get("departments", [])},
+        }
+        _store_counts(counts_key, counts)
+
+    docs, has_more = _pubreq_page(filt, qterms, after, cursor_arg, page, page_size, relevance)
+    body = {
+        "items": [_pubreq_item(doc) for doc in docs],
+        "total": counts["total"],
+        "facets": {"status": counts["status"], "departments": counts["departments"]},
+        "page_size": page_size,
+        "next_cursor": _encode_cursor(docs[-1]) if has_more and docs else None,
+    }
+    if cursor_arg is None:
+        body["page"] = page
+    return body
 
-        items = []
-        for doc in cursor:
-            # departments → array
-            departments = []
-            d = doc.get("departments")
-            if isinstance(d, dict):
-                departments = d.get("departments", []) or []
-            elif isinstance(d, list):
-                departments = d
-            elif isinstance(d, str):
-                try:
-                    parsed = json.loads(d)
-                    if isinstance(parsed, dict):
-                        departments = parsed.get("departments", []) or []
-                    elif isinstance(parsed, list):
-                        departments = parsed
-                except json.JSONDecodeError:
-                    departments = []
-
-            # attachments → add URLs
-            attachments = []
-            for f in (doc.get("attachments") or []):
-                if isinstance(f, dict) and f.get("file_id"):
-                    attachments.append({
-                        "file_id": f.get("file_id"),
-                        "filename": f.get("filename"),
-                        "mime": f.get("mime"),
-                        "url": f"/api/req/attachments/{f.get('file_id')}",
-                    })
-
-            items.append({
-                "id": str(doc.get("_id")),
-                "title": doc.get("title", ""),
-                "author": doc.get("author", ""),
-                "email": doc.get("email", ""),
-                "organization": doc.get("organization", ""),
-                "location": doc.get("location", ""),
-                "description": doc.get("description", ""),
-
-                # timing (raw + normalized)
-                "date": doc.get("date", ""),
-                "start_time": doc.get("start_time", ""),
-                "end_time": doc.get("end_time", ""),
-                "start_iso": doc.get("start_iso"),
-                "end_iso": doc.get("end_iso"),
-
-                # flags
-                "on_campus": bool(doc.get("on_campus", False)),
-                "max_attendees": doc.get("max_attendees"),
-                "publish_all": bool(doc.get("publish_all", False)),
-                "is_visible": bool(doc.get("is_visible", False)),
-                "status": doc.get("status", "pending"),
-
-                "departments": departments,
-                "attachments": attachments,
-
-                # audit
-                "created_at": doc.get("created_at"),
-                "updated_at": doc.get("updated_at"),
-            })
+@req_bp.route("/pubreqfetch", methods=["GET"])
+@roles_any({"staff", "admin"})
+def pubreqfetch():
+    """
+    Query params:
+      dept, status           filters
+      q, search              search text; search=text (default) or search=regex
+      sort                   relevance (default with text q) | date
+      page_size              1..200 (default 50)
+      cursor                 keyset mode: "" for the first page, then the returned next_cursor
+      page                   legacy offset mode (used when cursor is absent)
+      facets=1               single $facet aggregation: page + total + facets.status / facets.departments
+    Keyset pages skip count_documents; total is only returned without a cursor value.
+    Totals and facet counts are cached for PUBREQ_COUNT_CACHE_SECONDS.
+    Relevance ranking covers the newest search.MAX_CANDIDATES matches and uses page only.
+    """
+    try:
+        cursor_arg = request.args.get("cursor")
+        page      = int(request.args.get("page", "1"))
+        page_size = max(min(int(request.args.get("page_size", "50")), 200), 1)
+
+        filt, qterms, err = _pubreq_filter(request.args)
+        if err:
+            return jsonify({"error": "bad_request", "message": err}), 400
 
-        total = db.pub_req.count_documents(filt)
-        return jsonify({"items": items, "total": total, "page": page, "page_size": page_size}), 200
+        after = None
+        if cursor_arg:
+            try:
+                after = _after_cursor(*_decode_cursor(cursor_arg))
+            except ValueError:
+                return jsonify({"error": "bad_request", "message": "invalid cursor"}), 400
+
+        sort = (request.args.get("sort") or ("relevance" if qterms else "date")).strip().lower()
+        relevance = bool(qterms) and sort == "relevance" and cursor_arg is None
+
+        if _to_bool(request.args.get("facets")):
+            return jsonify(_pubreq_faceted(
+                request.args, filt, qterms, after, cursor_arg, page, page_size, relevance)), 200
+
+        docs, has_more = _pubreq_page(filt, qterms, after, cursor_arg, page, page_size, relevance)
+        if relevance:
+            return jsonify({
+                "items": [_pubreq_item(doc) for doc in docs],
+                "total": _count_pubreqs(filt), "page": page, "page_size": page_size, "next_cursor": None,
+            }), 200
+
+        items = [_pubreq_item(doc) for doc in docs]
+        next_cursor = _encode_cursor(docs[-1]) if has_more and docs else None
+
+        out = {"items": items, "page_size": page_size, "next_cursor": next_cursor}
+        if cursor_arg is None:
+            out["page"] = page
+        if not cursor_arg:
+            out["total"] = _count_pubreqs(filt)
+        return jsonify(out), 200
 
     except ValueError:
         return jsonify({"error": "bad_request", "message": "page and page_size must be integers"}), 400
+    except ExecutionTimeout:
+        return jsonify({"error": "timeout", "message": "query too expensive; narrow the search"}), 503
     except Exception as e:
         return jsonify({"error": "server_error", "message": str(e)}), 500
 
@@ -338,19 +603,54 @@ def pubreqfetch():
 # Serve attachment by file_id
 # -----------------------
 
+ATTACHMENT_BUFFER = 255 * 1024           # GridFS default chunk size
+ATTACHMENT_MAX_AGE = 365 * 24 * 3600     # file ids are immutable
+
+def _content_disposition(filename: str) -> dict:
+    try:
+        filename.encode("ascii")
+        return {"filename": filename}
+    except UnicodeEncodeError:
+        return {"filename*": f"UTF-8''{quote(filename, safe='')}"}
+
+def _attachment_response(response_class, grid_out, file_id: str, body):
+    """Attachment response with its caching headers; shared with api/asyncread.py."""
+    # md5 is only stored by older drivers; fall back to id + size (content never changes per id)
+    etag = getattr(grid_out, "md5", None) or f"{file_id}-{grid_out.length}"
+
+    rv = response_class(
+        body,
+        mimetype=grid_out.content_type or "application/octet-stream",
+        direct_passthrough=True,
+    )
+    rv.content_length = grid_out.length
+    rv.set_etag(etag)
+    if grid_out.upload_date:
+        rv.last_modified = grid_out.upload_date
+    rv.cache_control.public = True
+    rv.cache_control.max_age = ATTACHMENT_MAX_AGE
+    rv.cache_control.immutable = True
+    rv.headers.set("Content-Disposition", "inline", **_content_disposition(grid_out.filename or file_id))
+    return rv
+
 @req_bp.route("/attachments/<string:file_id>")
 def get_attachment(file_id):
+    """
+    Streams the GridFS file chunk by chunk (never fully buffered).
+    Supports Range requests, strong ETag / Last-Modified and 304 revalidation.
+    """
     try:
         grid_out = fs.get(ObjectId(file_id))
-        return send_file(
-            io.BytesIO(grid_out.read()),
-            download_name=grid_out.filename,
-            mimetype=grid_out.content_type,
-            as_attachment=False,
-        )
-    except NoFile:
+    except (NoFile, InvalidId, TypeError):
         return {"success": False, "message": "File not found"}, 404
 
+    rv = _attachment_response(
+        current_app.response_class, grid_out, file_id,
+        wrap_file(request.environ, grid_out, buffer_size=ATTACHMENT_BUFFER),
+    )
+    # handles If-None-Match / If-Modified-Since (304), Range (206) and unsatisfiable ranges (416)
+    return rv.make_conditional(request, accept_ranges=True, complete_length=grid_out.length)
+
 # -----------------------
 # Change status (+ visibility toggle)
 # -----------------------
@@ -384,7 +684,13 @@ def pubreqchangestatus():
     if "feedback" in data:
         upd["feedback"] = data.get("feedback")
 
-    db.pub_req.find_one_and_update({"_id": oid}, {"$set": upd})
+    before = db.pub_req.find_one_and_update(
+        {"_id": oid}, {"$set": upd},
+        projection={"event_id": 1, "status": 1, "start_at": 1, "end_at": 1, "start_iso": 1, "end_iso": 1},
+    )
+    # a status flip on a published request changes what its calendar window shows
+    if before and before.get("event_id") and before.get("status") != status:
+        calcache.invalidate(*_window_of(before))
     return jsonify({"success": True, "status": status, "is_visible": is_visible}), 200
 
 @req_bp.route("/pubreqdelete", methods=["POST"])
@@ -455,7 +761,7 @@ def pubreq_update():
                 upd[field] = data[field]
 
     if "departments" in data:
-        upd["departments"] = _normalize_departments(data["departments"])
+        upd["departments"] = departments.normalize(data["departments"])
 
     if "date" in data:
         start_time = data.get("start_time") or ""
@@ -464,85 +770,87 @@ def pubreq_update():
         upd["start_time"] = start_time
         upd["end_time"] = end_time
         try:
-            upd["start_iso"] = _combine_utc(data["date"], start_time)
-            upd["end_iso"] = _combine_utc(data["date"], end_time)
-            if upd["end_iso"] < upd["start_iso"]:
+            upd["start_at"] = _combine_utc(data["date"], start_time)
+            upd["end_at"] = _combine_utc(data["date"], end_time)
+            if upd["end_at"] < upd["start_at"]:
                 return jsonify({"success": False, "message": "end_time < start_time"}), 400
         except ValueError as e:
             return jsonify({"success": False, "message": str(e)}), 400
 
+    if any(f in upd for f in search.SEARCH_FIELDS):
+        upd["search_terms"] = search.terms_for({**doc, **upd})
+
     upd["updated_at"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
-    db.pub_req.find_one_and_update({"_id": oid}, {"$set": upd})
+    update = {"$set": upd}
+    if "start_at" in upd:
+        update["$unset"] = {"start_iso": "", "end_iso": ""}  # not yet backfilled
+    db.pub_req.find_one_and_update({"_id": oid}, update)
 
     updated = db.pub_req.find_one({"_id": oid})
+    updated.pop("search_terms", None)
+    updated["departments"] = updated.get("departments") or []
 
-    deps = updated.get("departments")
-    if isinstance(deps, dict):
-        updated["departments"] = deps.get("departments", []) or []
-    elif isinstance(deps, list):
-        updated["departments"] = deps
-    else:
-        updated["departments"] = []
-
-    updated = _convert_objectids(updated)
+    updated = _convert_objectids(timefields.public(updated))
 
     return jsonify({"success": True, "message": "Request updated", "publication": updated}), 200
 
+def _build_event_doc(payload: dict, files_meta: list, now: str):
+    """events document from a pub_req (or payload); returns (doc, err_payload, err_code)."""
+    # Copy attachments through if present (both branches can use it)
+    attachments = payload.get("attachments") or files_meta or []
+
+    title = payload.get("title")
+    organization = payload.get("organization")
+    description = payload.get("description")
+    location = payload.get("_location") or payload.get("location")
+    date = payload.get("date")  # "YYYY-MM-DD" or full ISO
+    start_time = (payload.get("start_time") or "").strip()
+    end_time = (payload.get("end_time") or "").strip() or start_time
+
+    # Normalize timing (UTC datetimes)
+    if date:
+        try:
+            start_at = _combine_utc(date, start_time)
+            end_at = _combine_utc(date, end_time)
+        except ValueError as e:
+            return None, {"success": False, "message": str(e)}, 400
+        if end_at < start_at:
+            return None, {"success": False, "message": "end_time < start_time"}, 400
+    else:
+        start_at = None
+        end_at = None
+
+    doc = {
+        "title": title,
+        "organization": organization,
+        "location": location,
+        "on_campus": _to_bool(payload.get("on_campus")),
+        "max_attendees": _to_int_or_none(payload.get("max_attendees")),
+
+        # raw timing (as submitted)
+        "date": date,
+        "start_time": start_time,
+        "end_time": end_time,
+
+        # normalized timing (UTC, native dates; see api/timefields.py)
+        "start_at": start_at,
+        "end_at": end_at,
+        "week_buckets": timefields.week_buckets(start_at, end_at),
+
+        "description": description,
+        "publish_all": _to_bool(payload.get("publish_all")),
+        "departments": departments.normalize(payload.get("departments")),
+        "attachments": attachments,
+        "created_at": now,
+    }
+    return doc, None, None
+
 @req_bp.route("/eventcreate", methods=["POST"])
 @roles_any({"staff", "admin"})
 def event_create():
     now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
-    def build_doc(payload: dict, files_meta: list):
-        # Copy attachments through if present (both branches can use it)
-        attachments = payload.get("attachments") or files_meta or []
-
-        title = payload.get("title")
-        organization = payload.get("organization")
-        description = payload.get("description")
-        location = payload.get("_location") or payload.get("location")
-        date = payload.get("date")  # "YYYY-MM-DD" or full ISO
-        start_time = (payload.get("start_time") or "").strip()
-        end_time = (payload.get("end_time") or "").strip() or start_time
-
-        # Normalize timing (UTC ISO)
-        if date:
-            try:
-                start_iso = _combine_utc(date, start_time)
-                end_iso = _combine_utc(date, end_time)
-            except ValueError as e:
-                return None, {"success": False, "message": str(e)}, 400
-            if end_iso < start_iso:
-                return None, {"success": False, "message": "end_time < start_time"}, 400
-        else:
-            start_iso = None
-            end_iso = None
-
-        doc = {
-            "title": title,
-            "organization": organization,
-            "location": location,
-            "on_campus": _to_bool(payload.get("on_campus")),
-            "max_attendees": _to_int_or_none(payload.get("max_attendees")),
-
-            # raw timing (as submitted)
-            "date": date,
-            "start_time": start_time,
-            "end_time": end_time,
-
-            # normalized timing (UTC)
-            "start_iso": start_iso,
-            "end_iso": end_iso,
-
-            "description": description,
-            "publish_all": _to_bool(payload.get("publish_all")),
-            "departments": _normalize_departments(payload.get("departments")),
-            "attachments": attachments,
-            "created_at": now,
-        }
-        return doc, None, None
-
     data = (request.get_json(silent=True) or {})
     if not data:
         return jsonify({"success": False, "message": "No data provided"}), 400
@@ -564,17 +872,18 @@ def event_create():
             return jsonify({"success": False, "message": "Request must be approved first"}), 409
 
         # Build event from source request (ignore client fields except the id)
-        doc, err_payload, err_code = build_doc(src, src.get("attachments") or [])
+        doc, err_payload, err_code = _build_event_doc(src, src.get("attachments") or [], now)
         if doc is None:
             return jsonify(err_payload), err_code
 
         # Idempotency: ensure one event per request
-        # (Create this unique index once in setup: db.events.create_index("source_request_id", unique=True))
+        # (unique index on events.source_request_id lives in api/indexes.py)
         doc["source_request_id"] = src["_id"]
 
         try:
             res = db.events.insert_one(doc)
             event_id = res.inserted_id
+            signups.ensure_counter({"_id": event_id, "max_attendees": doc.get("max_attendees")})
         except Exception as e:
             # If duplicate, fetch existing
             existing = db.events.find_one({"source_request_id": src["_id"]}, {"_id": 1})
@@ -587,10 +896,11 @@ def event_create():
             {"_id": src["_id"]},
             {"$set": {"event_id": event_id, "processed_at": now}}
         )
+        calcache.invalidate(*_window_of(doc))
 
         doc["_id"] = str(event_id)
         doc["source_request_id"] = str(src["_id"])
-        return jsonify({"success": True, "message": "Event created from request", "event": doc}), 201
+        return jsonify({"success": True, "message": "Event created from request", "event": timefields.public(doc)}), 201
 
 @req_bp.route("/eventdelete", methods=["POST"])
 @roles_any({"staff", "admin"})
@@ -613,11 +923,18 @@ def event_delete():
         return jsonify({"success": False, "message": "Invalid source_request_id"}), 400
 
     # Try to delete the event tied to that source_request_id
-    res = db.events.delete_one({"source_request_id": oid})
+    deleted = db.events.find_one_and_delete(
+        {"source_request_id": oid}, projection={"start_at": 1, "end_at": 1, "start_iso": 1, "end_iso": 1}
+    )
 
-    if res.deleted_count == 0:
+    if deleted is None:
         return jsonify({"success": False, "message": "No event found for that source_request_id"}), 404
 
+    signups.forget_event(deleted["_id"])
+    ical.forget(deleted["_id"])
+
+    calcache.invalidate(*_window_of(deleted))
+
     # Optionally, also unlink it from pub_req (if your schema links them)
     db.pub_req.update_one(
         {"_id": oid},
@@ -631,19 +948,233 @@ def event_delete():
         "deleted_source_request_id": src_id
     }), 200
 
-@req_bp.route("/eventfetch", methods=["GET"])
-def event_fetch():
+# -----------------------
+# Batch review (status changes + event creation)
+# -----------------------
+
+BATCH_MAX_IDS = 500
+
+def _normalize_status(raw):
+    status = (raw or "").strip().lower()
+    return "rejected" if status == "denied" else status
+
+def _parse_batch_ids(raw_ids):
+    """list of id strings → (ordered unique [(id_str, ObjectId | None)], error_message)"""
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return None, "ids must be a non-empty list"
+    if len(raw_ids) > BATCH_MAX_IDS:
+        return None, f"at most {BATCH_MAX_IDS} ids per batch"
+    out, seen = [], set()
+    for raw in raw_ids:
+        id_str = str(raw or "").strip()
+        if id_str in seen:
+            continue
+        seen.add(id_str)
+        try:
+            out.append((id_str, ObjectId(id_str)))
+        except Exception:
+            out.append((id_str, None))
+    return out, None
+
+def _create_events_for(src_docs, now):
     """
-    Query params:
-      start=YYYY-MM-DD  inclusive at 00:00Z
-      end=YYYY-MM-DD    exclusive at 00:00Z (use next day)
-    Returns events where [start_iso, end_iso) overlaps [start, end)
-    Only status=approved and is_visible=true.
+    Create (or find) the event for every approved request in src_docs.
+    Round trips: one upsert bulk_write on events.source_request_id, one find for the
+    resulting ids, one bulk_write linking pub_req, one for seat counters.
+    Returns {request ObjectId: outcome dict}.
+    """
+    outcomes, ops, built = {}, [], []
+    for src in src_docs:
+        if src.get("status") != "approved":
+            outcomes[src["_id"]] = {"ok": False, "error": "Request must be approved first"}
+            continue
+        doc, err_payload, _ = _build_event_doc(src, src.get("attachments") or [], now)
+        if doc is None:
+            outcomes[src["_id"]] = {"ok": False, "error": err_payload["message"]}
+            continue
+        doc["source_request_id"] = src["_id"]
+        ops.append(UpdateOne({"source_request_id": src["_id"]}, {"$setOnInsert": doc}, upsert=True))
+        built.append(doc)
+
+    if not ops:
+        return outcomes
+
+    created = set()
+    try:
+        created = set(db.events.bulk_write(ops, ordered=False).upserted_ids)
+    except BulkWriteError as e:
+        # a concurrent eventcreate won the unique index; the find below picks up its event
+        created = {u["index"] for u in e.details.get("upserted", [])}
+
+    src_ids = [d["source_request_id"] for d in built]
+    events = {e["source_request_id"]: e for e in db.events.find(
+        {"source_request_id": {"$in": src_ids}},
+        {"_id": 1, "source_request_id": 1, "max_attendees": 1},
+    )}
+
+    if events:
+        db.pub_req.bulk_write([
+            UpdateOne({"_id": sid}, {"$set": {"event_id": ev["_id"], "processed_at": now}})
+            for sid, ev in events.items()
+        ], ordered=False)
+        signups.ensure_counters(events.values())
+
+    calcache.invalidate_many(
+        _window_of(d) for i, d in enumerate(built) if i in created
+    )
+
+    for i, d in enumerate(built):
+        ev = events.get(d["source_request_id"])
+        if ev is None:
+            outcomes[d["source_request_id"]] = {"ok": False, "error": "event could not be stored"}
+        else:
+            outcomes[d["source_request_id"]] = {"ok": True, "event_id": str(ev["_id"]), "created": i in created}
+    return outcomes
+
+FEEDBACK_SUBJECT = "Karlstad University Events - Publication Feedback"
+
+def _queue_feedback(items, sender):
+    """
+    One feedback email per (pub_req doc, feedback) to its submitter, queued with a
+    single insert (api/outbox.py); the outbox workers send them many per pooled SMTP
+    connection with mailer.send_bulk. Returns {pub_req _id: outbox message id}.
+    """
+    messages, ids = [], []
+    for doc, feedback in items:
+        if not doc.get("email"):
+            continue
+        html, body = email_templates.render_feedback(
+            recipient_name=doc.get("author") or "Representative",
+            event_title=doc.get("title") or "Your Event Submission",
+            status=(doc.get("status") or "").capitalize(),
+            feedback_message=feedback or "Thank you for your submission.",
+            sender=sender or "admin@example.com",
+        )
+        messages.append({"subject": FEEDBACK_SUBJECT, "recipients": [doc["email"]],
+                         "body": body, "html": html, "sender": sender})
+        ids.append(doc["_id"])
+    return dict(zip(ids, outbox.enqueue_many(messages)))
+
+@req_bp.route("/pubreqchangestatus/batch", methods=["POST"])
+@roles_any({"staff", "admin"})
+def pubreqchangestatus_batch():
+    """
+    Expected JSON, either
+      { "items": [{ "id": str, "status": str, "feedback"?: str }, ...] }
+      { "ids": [str, ...], "status": str, "feedback"?: str }
+    plus optional "create_events": true to also create events for approved requests
+    and "notify": true to email each submitter the new status and feedback.
+    All transitions go out in one bulk_write and all emails in one outbox insert;
+    returns per-id outcomes in input order.
+    """
+    data = request.get_json(silent=True) or {}
+    if isinstance(data.get("items"), list):
+        entries = [e for e in data["items"] if isinstance(e, dict)]
+    else:
+        entries = [{"id": i, "status": data.get("status"), **({"feedback": data["feedback"]} if "feedback" in data else {})}
+                   for i in (data.get("ids") or [])]
+
+    parsed, err = _parse_batch_ids([e.get("id") for e in entries])
+    if err:
+        return jsonify({"success": False, "message": err}), 400
+    by_id = {}
+    for e in entries:
+        by_id.setdefault(str(e.get("id") or "").strip(), e)
+
+    results = {}
+    wanted = {}
+    for id_str, oid in parsed:
+        status = _normalize_status(by_id[id_str].get("status"))
+        if oid is None:
+            results[id_str] = {"ok": False, "error": "invalid id"}
+        elif status not in {"pending", "approved", "rejected"}:
+            results[id_str] = {"ok": False, "error": "valid status required"}
+        else:
+            wanted[oid] = (id_str, status)
+
+    create_events = _to_bool(data.get("create_events"))
+    notify = _to_bool(data.get("notify"))
+    projection = None if create_events else {
+        "event_id": 1, "status": 1, "start_at": 1, "end_at": 1, "start_iso": 1, "end_iso": 1,
+        **({"email": 1, "author": 1, "title": 1} if notify else {}),
+    }
+    before = {d["_id"]: d for d in db.pub_req.find({"_id": {"$in": list(wanted)}}, projection)} if wanted else {}
+
+    now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    ops, stale = [], []
+    for oid, (id_str, status) in wanted.items():
+        doc = before.get(oid)
+        if doc is None:
+            results[id_str] = {"ok": False, "error": "not found"}
+            continue
+        upd = {"status": status, "is_visible": status == "approved", "updated_at": now}
+        if "feedback" in by_id[id_str]:
+            upd["feedback"] = by_id[id_str].get("feedback")
+        ops.append(UpdateOne({"_id": oid}, {"$set": upd}))
+        if doc.get("event_id") and doc.get("status") != status:
+            stale.append(_window_of(doc))
+        doc.update(upd)
+        results[id_str] = {"ok": True, "status": status, "is_visible": upd["is_visible"]}
+
+    if ops:
+        db.pub_req.bulk_write(ops, ordered=False)
+    calcache.invalidate_many(stale)
+
+    if notify:
+        updated = [(before[oid], by_id[id_str].get("feedback")) for oid, (id_str, _) in wanted.items()
+                   if results[id_str]["ok"]]
+        for oid, message_id in _queue_feedback(updated, session.get("email")).items():
+            results[wanted[oid][0]]["email_id"] = str(message_id)
+
+    if create_events:
+        approved = [before[oid] for oid, (id_str, _) in wanted.items()
+                    if results[id_str]["ok"] and before[oid]["status"] == "approved"]
+        for oid, outcome in _create_events_for(approved, now).items():
+            results[wanted[oid][0]]["event"] = outcome
+
+    return jsonify({"success": True, "results": [{"id": id_str, **results[id_str]} for id_str, _ in parsed]}), 200
+
+@req_bp.route("/eventcreate/batch", methods=["POST"])
+@roles_any({"staff", "admin"})
+def event_create_batch():
+    """
+    Expected JSON body: { "ids": ["<request_id>", ...] }
+    Creates one event per approved request (idempotent on source_request_id).
+    Returns per-id outcomes in input order.
     """
-    start = (request.args.get("start") or "").strip()
-    end   = (request.args.get("end") or "").strip()
+    data = request.get_json(silent=True) or {}
+    parsed, err = _parse_batch_ids(data.get("ids"))
+    if err:
+        return jsonify({"success": False, "message": err}), 400
+
+    oids = [oid for _, oid in parsed if oid is not None]
+    srcs = list(db.pub_req.find({"_id": {"$in": oids}})) if oids else []
+    now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    outcomes = _create_events_for(srcs, now)
+
+    results = []
+    for id_str, oid in parsed:
+        if oid is None:
+            results.append({"id": id_str, "ok": False, "error": "invalid id"})
+        elif oid not in outcomes:
+            results.append({"id": id_str, "ok": False, "error": "Request not found"})
+        else:
+            results.append({"id": id_str, **outcomes[oid]})
+    return jsonify({"success": True, "results": results}), 200
+
+# -----------------------
+# Public calendar reads (cached per [start, end) window, see api/calcache.py)
+# -----------------------
+
+def _parse_window(args):
+    """
+    start/end query args → ('...Z', '...Z', None) or (None, None, (payload, code)).
+    The ISO strings key the window cache; timefields.parse_iso() turns them back into dates.
+    """
+    start = (args.get("start") or "").strip()
+    end   = (args.get("end") or "").strip()
     if not start or not end:
-        return jsonify({"success": False, "message": "start and end required (YYYY-MM-DD)"}), 400
+        return None, None, ({"success": False, "message": "start and end required (YYYY-MM-DD)"}, 400)
 
     try:
         # build UTC ISO range
@@ -653,51 +1184,111 @@ def event_fetch():
         s_iso = datetime(s_year, s_mon, s_day, 0, 0, tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
         e_iso = datetime(e_year, e_mon, e_day, 0, 0, tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
     except Exception:
-        return jsonify({"success": False, "message": "invalid start/end format"}), 400
+        return None, None, ({"success": False, "message": "invalid start/end format"}, 400)
+
+    return s_iso, e_iso, None
+
+# The pieces below are shared with the asyncio read path (api/asyncread.py).
 
+CALENDAR_PROJECTION = {
+    "_id": 1, "title": 1, "description": 1,
+    "start_at": 1, "end_at": 1, "start_iso": 1, "end_iso": 1,
+    "location": 1, "on_campus": 1,
+    "departments": 1,
+    "max_attendees": 1,
+}
+
+def _calendar_filter(s_iso: str, e_iso: str) -> dict:
     # overlap test: event.start < range_end AND event.end > range_start
-    filt = {
-        "start_iso": {"$lt": e_iso},
-        "end_iso":   {"$gt": s_iso},
+    return timefields.range_filter(timefields.parse_iso(s_iso), timefields.parse_iso(e_iso))
+
+def _calendar_item(d: dict) -> dict:
+    return {
+        "id": str(d["_id"]),
+        "title": d.get("title", ""),
+        "start": timefields.doc_time(d, "start"),    # ISO string
+        "end":   timefields.doc_time(d, "end"),
+        "location": d.get("location", ""),
+        "on_campus": bool(d.get("on_campus", False)),
+        "description": d.get("description", ""),
+        "departments": d.get("departments") or [],
+        "max_attendees": d.get("max_attendees"),
     }
 
-    # projection
-    cur = db.events.find(filt, {
-        "_id": 1, "title": 1, "description": 1,
-        "start_iso": 1, "end_iso": 1,
-        "location": 1, "on_campus": 1,
-        "departments": 1,
-        "max_attendees": 1,
-    }).sort([("start_iso", 1)])
-
-    items = []
-    for d in cur:
-        # normalize departments array
-        deps = []
-        raw = d.get("departments")
-        if isinstance(raw, dict):
-            deps = raw.get("departments", []) or []
-        elif isinstance(raw, list):
-            deps = raw
-        elif isinstance(raw, str):
-            try:
-                p = json.loads(raw); deps = (p.get("departments") if isinstance(p, dict) else p) or []
-            except json.JSONDecodeError:
-                deps = []
-
-        items.append({
-            "id": str(d["_id"]),
-            "title": d.get("title", ""),
-            "start": d.get("start_iso"),    # ISO string
-            "end":   d.get("end_iso"),
-            "location": d.get("location", ""),
-            "on_campus": bool(d.get("on_campus", False)),
-            "description": d.get("description", ""),
-            "departments": deps,
-            "max_attendees": d.get("max_attendees"),
-        })
-
-    return jsonify({"success": True, "items": items})
+def _calendar_ordered(items: list, filt: dict) -> list:
+    if "$or" in filt:
+        # mixed legacy/native docs mid-migration: the index order only covers start_at
+        items.sort(key=lambda i: i["start"] or "")
+    return items
+
+def _calendar_cache_value(items: list) -> bytes:
+    """Cache value: b"id,id,...\n" + items JSON."""
+    return ",".join(i["id"] for i in items).encode("ascii") + b"\n" \
+        + json.dumps(items, separators=(",", ":")).encode("utf-8")
+
+def _calendar_cached_ids(cached: bytes) -> list:
+    ids_part, _, _ = cached.partition(b"\n")
+    return [ObjectId(i) for i in ids_part.decode("ascii").split(",") if i]
+
+def _calendar_body(cached: bytes, counts: dict) -> bytes:
+    _, _, items_json = cached.partition(b"\n")
+    counts = {str(k): v for k, v in counts.items()}
+    return b'{"success":true,"items":' + items_json \
+        + b',"headcounts":' + json.dumps(counts, separators=(",", ":")).encode("utf-8") + b'}'
+
+def _calendar_slice(cached: bytes, window: tuple, s_iso: str, e_iso: str) -> bytes:
+    """Cache value of the covering window narrowed to the items overlapping [s_iso, e_iso)."""
+    if window == (s_iso, e_iso):
+        return cached
+    start, end = timefields.parse_iso(s_iso), timefields.parse_iso(e_iso)
+    _, _, items_json = cached.partition(b"\n")
+    items = [
+        i for i in json.loads(items_json)
+        if i["start"] and i["end"]
+        and timefields.parse_iso(i["start"]) < end and timefields.parse_iso(i["end"]) > start
+    ]
+    return _calendar_cache_value(items)
+
+def _calendar_items(s_iso: str, e_iso: str):
+    filt = _calendar_filter(s_iso, e_iso)
+    cur = db.events.find(filt, CALENDAR_PROJECTION).sort([("start_at", 1)])
+    return _calendar_ordered([_calendar_item(d) for d in cur], filt)
+
+def _calendar_response(s_iso: str, e_iso: str):
+    """
+    Serve {"success": true, "items": [...], "headcounts": {id: n}}.
+    items come from the cached month-aligned window covering the request (filled on a
+    miss), or straight from Mongo when the request is wider than calcache allows;
+    headcounts change with every registration, so they are not cached but fetched in
+    one aggregation per request.
+    """
+    window = calcache.cache_window(s_iso, e_iso)
+    if window is None:
+        cached = _calendar_cache_value(_calendar_items(s_iso, e_iso))
+    else:
+        cached = calcache.get(*window)
+        if cached is None:
+            gen = calcache.generation()
+            cached = _calendar_cache_value(_calendar_items(*window))
+            calcache.put(*window, cached, gen)
+        cached = _calendar_slice(cached, window, s_iso, e_iso)
+
+    counts = signups.headcounts(_calendar_cached_ids(cached))
+    return current_app.response_class(_calendar_body(cached, counts), mimetype="application/json")
+
+@req_bp.route("/eventfetch", methods=["GET"])
+def event_fetch():
+    """
+    Query params:
+      start=YYYY-MM-DD  inclusive at 00:00Z
+      end=YYYY-MM-DD    exclusive at 00:00Z (use next day)
+    Returns events where [start_at, end_at) overlaps [start, end)
+    Only status=approved and is_visible=true.
+    """
+    s_iso, e_iso, err = _parse_window(request.args)
+    if err:
+        return jsonify(err[0]), err[1]
+    return _calendar_response(s_iso, e_iso)
 
 @req_bp.route("/calendar", methods=["GET"])
 def calendar_range():
@@ -705,65 +1296,204 @@ def calendar_range():
     Query params:
       start=YYYY-MM-DD  inclusive at 00:00Z
       end=YYYY-MM-DD    exclusive at 00:00Z (use next day)
-    Returns events where [start_iso, end_iso) overlaps [start, end)
+    Returns events where [start_at, end_at) overlaps [start, end)
     Only status=approved and is_visible=true.
     """
-    start = (request.args.get("start") or "").strip()
-    end   = (request.args.get("end") or "").strip()
-    if not start or not end:
-        return jsonify({"success": False, "message": "start and end required (YYYY-MM-DD)"}), 400
+    s_iso, e_iso, err = _parse_window(request.args)
+    if err:
+        return jsonify(err[0]), err[1]
+    return _calendar_response(s_iso, e_iso)
 
-    try:
-        # build UTC ISO range
-        s_year, s_mon, s_day = map(int, start.split("-"))
-        e_year, e_mon, e_day = map(int, end.split("-"))
+@req_bp.route("/calendar.ics", methods=["GET"])
+def calendar_ics():
+    """
+    iCalendar feed of all events (see api/ical.py); conditional GET via
+    ETag / Last-Modified returns 304 when nothing changed.
+    """
+    return ical.feed_response()
 
-        s_iso = datetime(s_year, s_mon, s_day, 0, 0, tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
-        e_iso = datetime(e_year, e_mon, e_day, 0, 0, tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+@req_bp.route("/calendar/<string:dept>.ics", methods=["GET"])
+def calendar_ics_department(dept):
+    """iCalendar feed of one department's events (plus publish_all events)."""
+    return ical.feed_response(dept)
+
+# -----------------------
+# Export (streamed NDJSON / CSV)
+# -----------------------
+
+EXPORT_BATCH_SIZE = 1000
+
+PUBREQ_EXPORT_FIELDS = [
+    "id", "title", "author", "email", "organization", "location", "description",
+    "date", "start_time", "end_time", "start_iso", "end_iso",
+    "on_campus", "max_attendees", "publish_all", "is_visible", "status",
+    "departments", "attachments", "created_at", "updated_at",
+]
+
+EVENT_EXPORT_FIELDS = [
+    "id", "source_request_id", "title", "start", "end", "location", "on_campus",
+    "description", "departments", "max_attendees", "created_at",
+]
+
+CSV_FORMULA_CHARS = ("=", "+", "-", "@", "\t", "\r")
+
+def _csv_value(v):
+    if isinstance(v, list):
+        v = ";".join(str(x.get("filename") if isinstance(x, dict) else x) for x in v)
+    if v is None:
+        return ""
+    if isinstance(v, str) and v.startswith(CSV_FORMULA_CHARS):
+        return "'" + v   # spreadsheets would evaluate it as a formula (CSV injection)
+    return v
+
+def _stream_rows(rows, fmt: str, fields: list, name: str):
+    """Generator response for an iterable of dicts; memory stays flat."""
+    def generate():
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(fields)
+            for row in rows:
+                writer.writerow([_csv_value(row.get(f)) for f in fields])
+                if buf.tell() > 64 * 1024:
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+            yield buf.getvalue()
+        else:
+            for row in rows:
+                yield json.dumps(row, default=str) + "\n"
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d")
+    ext, mimetype = ("csv", "text/csv") if fmt == "csv" else ("ndjson", "application/x-ndjson")
+    rv = Response(stream_with_context(generate()), mimetype=mimetype)
+    rv.headers.set("Content-Disposition", "attachment", filename=f"{name}-{stamp}.{ext}")
+    return rv
+
+def _export_format():
+    fmt = (request.args.get("format") or "ndjson").strip().lower()
+    return fmt if fmt in {"ndjson", "csv"} else None
+
+@req_bp.route("/pubreqexport", methods=["GET"])
+@roles_any({"staff", "admin"})
+def pubreq_export():
+    """
+    Query params: format=ndjson|csv (default ndjson) plus the pubreqfetch filters
+    (dept, status, q, search). Streams every match in (start_at, _id) desc order.
+    """
+    fmt = _export_format()
+    if fmt is None:
+        return jsonify({"error": "bad_request", "message": "format must be ndjson or csv"}), 400
+    filt, _qterms, err = _pubreq_filter(request.args)
+    if err:
+        return jsonify({"error": "bad_request", "message": err}), 400
+
+    projection = {f: 1 for f in PUBREQ_EXPORT_FIELDS if f != "id"}
+    projection.update(start_at=1, end_at=1)
+    cursor = (
+        db.pub_req.find(filt, projection)
+        .sort([("start_at", -1), ("_id", -1)])
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+    return _stream_rows((_pubreq_item(doc) for doc in cursor), fmt, PUBREQ_EXPORT_FIELDS, "publication-requests")
+
+@req_bp.route("/eventexport", methods=["GET"])
+@roles_any({"staff", "admin"})
+def event_export():
+    """
+    Query params: format=ndjson|csv (default ndjson); optional start/end (YYYY-MM-DD)
+    restrict to events overlapping [start, end) like /calendar.
+    """
+    fmt = _export_format()
+    if fmt is None:
+        return jsonify({"error": "bad_request", "message": "format must be ndjson or csv"}), 400
+
+    filt = {}
+    if request.args.get("start") or request.args.get("end"):
+        s_iso, e_iso, err = _parse_window(request.args)
+        if err:
+            return jsonify(err[0]), err[1]
+        filt = timefields.range_filter(timefields.parse_iso(s_iso), timefields.parse_iso(e_iso))
+
+    cursor = db.events.find(filt, {
+        "_id": 1, "source_request_id": 1, "title": 1,
+        "start_at": 1, "end_at": 1, "start_iso": 1, "end_iso": 1,
+        "location": 1, "on_campus": 1, "description": 1, "departments": 1,
+        "max_attendees": 1, "created_at": 1,
+    }).sort([("start_at", 1)]).batch_size(EXPORT_BATCH_SIZE)
+
+    def rows():
+        for d in cursor:
+            yield {
+                "id": str(d["_id"]),
+                "source_request_id": str(d["source_request_id"]) if d.get("source_request_id") else None,
+                "title": d.get("title", ""),
+                "start": timefields.doc_time(d, "start"),
+                "end": timefields.doc_time(d, "end"),
+                "location": d.get("location", ""),
+                "on_campus": bool(d.get("on_campus", False)),
+                "description": d.get("description", ""),
+                "departments": d.get("departments") or [],
+                "max_attendees": d.get("max_attendees"),
+                "created_at": d.get("created_at"),
+            }
+
+    return _stream_rows(rows(), fmt, EVENT_EXPORT_FIELDS, "events")
+
+# -----------------------
+# Attendees / headcounts (db.signups, see api/signups.py)
+# -----------------------
+
+HEADCOUNT_MAX_IDS = 500
+
+@req_bp.route("/events/<string:event_id>/attendees", methods=["GET"])
+@roles_any({"staff", "admin"})
+def event_attendees(event_id):
+    """
+    Query params: page (default 1), page_size (1..500, default 100)
+    Returns attendees projected to name / email / allergy (catering list).
+    """
+    try:
+        oid = ObjectId(event_id)
     except Exception:
-        return jsonify({"success": False, "message": "invalid start/end format"}), 400
+        return jsonify({"success": False, "message": "invalid event id"}), 400
+    try:
+        page      = max(int(request.args.get("page", "1")), 1)
+        page_size = max(min(int(request.args.get("page_size", "100")), 500), 1)
+    except ValueError:
+        return jsonify({"success": False, "message": "page and page_size must be integers"}), 400
+
+    rows = signups.roster(oid, (page - 1) * page_size, page_size)
+    items = [{
+        "user_id": str(r.get("user_id")),
+        "name": r.get("name") or "",
+        "email": r.get("email") or "",
+        "allergy": r.get("allergy") or "none",
+        "status": r.get("status", "attending"),
+        "registered_at": r.get("created_at"),
+    } for r in rows]
+
+    total = signups.headcounts([oid])[oid]
+    return jsonify({"success": True, "items": items, "total": total, "page": page, "page_size": page_size}), 200
+
+@req_bp.route("/events/headcounts", methods=["POST"])
+def event_headcounts():
+    """
+    Expected JSON body: { "ids": ["<event_id>", ...] } (at most HEADCOUNT_MAX_IDS)
+    Returns { "success": true, "headcounts": { "<event_id>": n, ... } }
+    """
+    data = request.get_json(silent=True) or {}
+    raw_ids = data.get("ids")
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return jsonify({"success": False, "message": "ids must be a non-empty list"}), 400
+    if len(raw_ids) > HEADCOUNT_MAX_IDS:
+        return jsonify({"success": False, "message": f"at most {HEADCOUNT_MAX_IDS} ids"}), 400
 
-    # overlap test: event.start < range_end AND event.end > range_start
-    filt = {
-        "start_iso": {"$lt": e_iso},
-        "end_iso":   {"$gt": s_iso},
-    }
+    try:
+        oids = list({ObjectId(str(i)) for i in raw_ids})
+    except Exception:
+        return jsonify({"success": False, "message": "invalid id in ids"}), 400
 
-    # projection
-    cur = db.events.find(filt, {
-        "_id": 1, "title": 1, "description": 1,
-        "start_iso": 1, "end_iso": 1,
-        "location": 1, "on_campus": 1,
-        "departments": 1,
-        "max_attendees": 1,
-    }).sort([("start_iso", 1)])
-
-    items = []
-    for d in cur:
-        # normalize departments array
-        deps = []
-        raw = d.get("departments")
-        if isinstance(raw, dict):
-            deps = raw.get("departments", []) or []
-        elif isinstance(raw, list):
-            deps = raw
-        elif isinstance(raw, str):
-            try:
-                p = json.loads(raw); deps = (p.get("departments") if isinstance(p, dict) else p) or []
-            except json.JSONDecodeError:
-                deps = []
-
-        items.append({
-            "id": str(d["_id"]),
-            "title": d.get("title", ""),
-            "start": d.get("start_iso"),    # ISO string
-            "end":   d.get("end_iso"),
-            "location": d.get("location", ""),
-            "on_campus": bool(d.get("on_campus", False)),
-            "description": d.get("description", ""),
-            "departments": deps,
-            "max_attendees": d.get("max_attendees"),
-        })
-
-    return jsonify({"success": True, "items": items})
+    counts = signups.headcounts(oids)
+    return jsonify({"success": True, "headcounts": {str(k): v for k, v in counts.items()}}), 200
 
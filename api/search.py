@@ -0,0 +1,157 @@
+# backend/api/search.py
+"""
+Token/prefix search for publication requests.
+
+Each pub_req document carries a `search_terms` array holding every token of the
+searchable fields plus its prefixes (multikey-indexed, see api/indexes.py).
+A query becomes {"search_terms": {"$all": [...]}} so matching is index-bounded,
+and the (capped) candidate set is ranked by field-weighted hits in Python.
+
+Documents written before search_terms existed are tagged by backfill() (run in
+a background thread at startup and via `flask search backfill`); until it has
+completed, text_filter() also matches untagged documents with word-prefix regexes.
+"""
+
+import re
+
+import click
+from pymongo import UpdateOne
+
+from .. import db
+from . import migrations
+
+MIGRATION_ID = "pub_req_search_terms"
+
+# field -> ranking weight
+SEARCH_FIELDS = {
+    "title": 8,
+    "organization": 4,
+    "author": 4,
+    "location": 2,
+    "email": 2,
+    "description": 1,
+}
+
+MIN_TERM = 2              # shorter tokens are ignored
+MAX_PREFIX = 15           # longest prefix stored / matched
+MAX_FIELD_TOKENS = 300    # keeps search_terms bounded for long descriptions
+MAX_QUERY_TERMS = 6       # bounded $all per query
+MAX_CANDIDATES = 1000     # bounded ranking work per query
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# -----------------------
+# Helpers
+# -----------------------
+
+def tokenize(text) -> list:
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(str(text).lower()) if len(t) >= MIN_TERM]
+
+def terms_for(doc: dict) -> list:
+    """All tokens and their prefixes for the searchable fields of doc."""
+    terms = set()
+    for field in SEARCH_FIELDS:
+        for tok in tokenize(doc.get(field))[:MAX_FIELD_TOKENS]:
+            tok = tok[:MAX_PREFIX]
+            for i in range(MIN_TERM, len(tok) + 1):
+                terms.add(tok[:i])
+    return sorted(terms)
+
+def query_terms(q: str) -> list:
+    """Normalized query tokens, deduplicated and capped."""
+    out = []
+    for tok in tokenize(q):
+        tok = tok[:MAX_PREFIX]
+        if tok not in out:
+            out.append(tok)
+        if len(out) == MAX_QUERY_TERMS:
+            break
+    return out
+
+def score(doc: dict, qterms: list) -> int:
+    """Exact token hits count double, prefix hits single, scaled by field weight."""
+    total = 0
+    for field, weight in SEARCH_FIELDS.items():
+        toks = tokenize(doc.get(field))[:MAX_FIELD_TOKENS]
+        if not toks:
+            continue
+        tokset = set(toks)
+        for qt in qterms:
+            if qt in tokset:
+                total += 2 * weight
+            elif any(t.startswith(qt) for t in toks):
+                total += weight
+    return total
+
+def rank(docs: list, qterms: list) -> list:
+    """Stable sort by score; input order (newest first) breaks ties."""
+    return sorted(docs, key=lambda d: -score(d, qterms))
+
+def text_filter(qterms: list) -> dict:
+    """pub_req filter for non-empty qterms (every term must match a token or token prefix)."""
+    indexed = {"search_terms": {"$all": qterms}}
+    if migrations.is_done(MIGRATION_ID):
+        return indexed
+    legacy = {"search_terms": {"$exists": False}, "$and": [
+        {"$or": [{field: re.compile(r"\b" + re.escape(qt), re.IGNORECASE)} for field in SEARCH_FIELDS]}
+        for qt in qterms
+    ]}
+    return {"$or": [indexed, legacy]}
+
+# -----------------------
+# Maintenance
+# -----------------------
+
+def backfill(database=None, batch_size=500) -> int:
+    """Tag documents that have no search_terms yet, in _id order. Returns the number tagged."""
+    database = database if database is not None else db
+    projection = {f: 1 for f in SEARCH_FIELDS}
+    n, last_id = 0, None
+    while True:
+        filt = {"search_terms": {"$exists": False}}
+        if last_id is not None:
+            filt["_id"] = {"$gt": last_id}
+        docs = list(database.pub_req.find(filt, projection).sort("_id", 1).limit(batch_size))
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+        n += database.pub_req.bulk_write([
+            UpdateOne({"_id": d["_id"], "search_terms": {"$exists": False}}, {"$set": {"search_terms": terms_for(d)}})
+            for d in docs
+        ], ordered=False).modified_count
+    migrations.mark_done(MIGRATION_ID, database, tagged=n)
+    return n
+
+def reindex(database=None, batch_size=500) -> int:
+    """Recompute search_terms for every pub_req document. Returns the number updated."""
+    database = database if database is not None else db
+    projection = {f: 1 for f in SEARCH_FIELDS}
+    ops, n = [], 0
+    for doc in database.pub_req.find({}, projection).batch_size(batch_size):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_terms": terms_for(doc)}}))
+        if len(ops) >= batch_size:
+            n += database.pub_req.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        n += database.pub_req.bulk_write(ops, ordered=False).modified_count
+    return n
+
+def init_app(app):
+    @app.cli.group("search")
+    def search_cli():
+        """Maintain the publication request search terms."""
+
+    @search_cli.command("reindex")
+    def reindex_cmd():
+        """Backfill search_terms on existing pub_req documents."""
+        click.echo(f"updated {reindex()} documents")
+
+    @search_cli.command("backfill")
+    def backfill_cmd():
+        """Tag only the documents that have no search_terms yet."""
+        click.echo(f"tagged {backfill()} documents")
+
+    if app.config.get("SEARCH_BACKFILL_ON_STARTUP", True) and not migrations.is_done(MIGRATION_ID):
+        migrations.run_in_background(app, "search terms", backfill)
@@ -0,0 +1,246 @@
+# backend/api/signups.py
+"""
+Event registrations.
+
+db.signups holds one document per (event_id, user_id) (unique index) and
+db.event_seats one counter per event: {_id: event_id, taken, capacity}.
+A registration inserts the signup and then claims a seat with a single
+conditional $inc that only matches while taken < capacity; if the event is
+full, or anything after the insert fails, the signup is removed again.
+capacity None means unlimited. Counters are seeded when the event is created
+(ensure_counter) and lazily for events that predate them.
+Until migrate_embedded() has run (in the background at startup, or
+`flask signups migrate`), register() also treats an entry in the legacy
+users.signups array as an existing registration.
+"""
+
+from datetime import datetime, timezone
+
+import click
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from .. import db
+from . import migrations
+
+# register() outcomes
+REGISTERED = "registered"
+ALREADY = "already_registered"
+FULL = "full"
+NO_EVENT = "no_event"
+
+MIGRATION_ID = "signups_embedded"
+BATCH_SIZE = 500
+# multikey index on the legacy arrays; nothing queries it once they are gone
+LEGACY_INDEXES = {"users": ("signups_event_id",)}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+def _capacity(event):
+    cap = event.get("max_attendees")
+    return cap if isinstance(cap, int) and cap > 0 else None
+
+def ensure_counter(event):
+    db.event_seats.update_one(
+        {"_id": event["_id"]},
+        {"$setOnInsert": {"taken": 0, "capacity": _capacity(event)}},
+        upsert=True,
+    )
+
+def ensure_counters(events):
+    """ensure_counter() for many events in one bulk write."""
+    ops = [UpdateOne(
+        {"_id": e["_id"]},
+        {"$setOnInsert": {"taken": 0, "capacity": _capacity(e)}},
+        upsert=True,
+    ) for e in events]
+    if ops:
+        db.event_seats.bulk_write(ops, ordered=False)
+
+def _claim_seat(event_id) -> bool:
+    res = db.event_seats.update_one(
+        {"_id": event_id, "$or": [
+            {"capacity": None},
+            {"$expr": {"$lt": ["$taken", "$capacity"]}},
+        ]},
+        {"$inc": {"taken": 1}},
+    )
+    return res.modified_count == 1
+
+def _release_seat(event_id):
+    db.event_seats.update_one({"_id": event_id, "taken": {"$gt": 0}}, {"$inc": {"taken": -1}})
+
+def _take_seat(event_id) -> str:
+    if _claim_seat(event_id):
+        return REGISTERED
+    # full, or no counter yet (event predates counters / does not exist)
+    if db.event_seats.find_one({"_id": event_id}, {"_id": 1}) is not None:
+        return FULL
+    event = db.events.find_one({"_id": event_id}, {"max_attendees": 1})
+    if event is None:
+        return NO_EVENT
+    ensure_counter(event)
+    return REGISTERED if _claim_seat(event_id) else FULL
+
+def _legacy_signup(event_id, user_id) -> bool:
+    """Registered in the users.signups array (event_id stored as ObjectId or string)."""
+    return db.users.find_one(
+        {"_id": user_id, "signups.event_id": {"$in": [event_id, str(event_id)]}},
+        {"_id": 1},
+    ) is not None
+
+# -----------------------
+# Public API
+# -----------------------
+
+def register(event_id: ObjectId, user_id: ObjectId) -> str:
+    if not migrations.is_done(MIGRATION_ID) and _legacy_signup(event_id, user_id):
+        return ALREADY
+    try:
+        db.signups.insert_one({
+            "event_id": event_id,
+            "user_id": user_id,
+            "status": "attending",
+            "created_at": _now(),
+        })
+    except DuplicateKeyError:
+        return ALREADY
+
+    outcome = None
+    try:
+        outcome = _take_seat(event_id)
+    finally:
+        # full, no such event, or the seat claim raised: undo the insert
+        if outcome != REGISTERED:
+            db.signups.delete_one({"event_id": event_id, "user_id": user_id})
+    return outcome
+
+def unregister(event_id: ObjectId, user_id: ObjectId) -> bool:
+    res = db.signups.delete_one({"event_id": event_id, "user_id": user_id})
+    if res.deleted_count:
+        _release_seat(event_id)
+        return True
+    return False
+
+def forget_event(event_id: ObjectId):
+    """Drop all registrations and the seat counter of a deleted event."""
+    db.signups.delete_many({"event_id": event_id})
+    db.event_seats.delete_one({"_id": event_id})
+
+def _headcount_pipeline(ids: list) -> list:
+    return [
+        {"$match": {"event_id": {"$in": ids}}},
+        {"$group": {"_id": "$event_id", "n": {"$sum": 1}}},
+    ]
+
+def headcounts(event_ids) -> dict:
+    """{event_id: attending count} for many events in one indexed aggregation."""
+    ids = list(event_ids)
+    if not ids:
+        return {}
+    counts = {eid: 0 for eid in ids}
+    for row in db.signups.aggregate(_headcount_pipeline(ids)):
+        counts[row["_id"]] = row["n"]
+    return counts
+
+async def headcounts_async(database, event_ids) -> dict:
+    """headcounts() on an async (pymongo AsyncMongoClient) database."""
+    ids = list(event_ids)
+    if not ids:
+        return {}
+    counts = {eid: 0 for eid in ids}
+    async for row in await database.signups.aggregate(_headcount_pipeline(ids)):
+        counts[row["_id"]] = row["n"]
+    return counts
+
+def roster(event_id: ObjectId, skip: int, limit: int) -> list:
+    """Attendees of one event for catering: name, email and allergy."""
+    return list(db.signups.aggregate([
+        {"$match": {"event_id": event_id}},
+        {"$sort": {"user_id": 1}},          # served by the (event_id, user_id) index
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "_id", "as": "user"}},
+        {"$unwind": "$user"},
+        {"$project": {
+            "_id": 0,
+            "user_id": 1,
+            "status": 1,
+            "created_at": 1,
+            "name": "$user.username",
+            "email": "$user.email",
+            "allergy": "$user.allergy",
+        }},
+    ]))
+
+def seats(event_id: ObjectId):
+    doc = db.event_seats.find_one({"_id": event_id}) or {}
+    return {"taken": doc.get("taken", 0), "capacity": doc.get("capacity")}
+
+# -----------------------
+# Migration from users.signups arrays
+# -----------------------
+
+def migrate_embedded(database=None) -> int:
+    """
+    Copy legacy users.signups[] entries into db.signups and unset the arrays,
+    then record the migration (register() stops checking the arrays) and drop
+    their index. Idempotent. Returns the number of signups copied.
+
+    Safe while registrations are served: counters are never overwritten. Every
+    event first gets a counter the way the lazy path creates one ($setOnInsert
+    taken 0; an event without a counter has no completed registration), then each
+    copied signup takes its seat with $inc, which commutes with register().
+    Copied signups may push taken past capacity; they were already registered.
+    """
+    database = database if database is not None else db
+    ops = []
+    for event in database.events.find({}, {"max_attendees": 1}):
+        ops.append(UpdateOne(
+            {"_id": event["_id"]},
+            {"$setOnInsert": {"taken": 0, "capacity": _capacity(event)}},
+            upsert=True,
+        ))
+        if len(ops) >= BATCH_SIZE:
+            database.event_seats.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        database.event_seats.bulk_write(ops, ordered=False)
+
+    copied = 0
+    for user in database.users.find({"signups": {"$exists": True}}, {"signups": 1}):
+        for s in (user.get("signups") or []):
+            raw = (s or {}).get("event_id")
+            try:
+                eid = raw if isinstance(raw, ObjectId) else ObjectId(str(raw))
+            except Exception:
+                continue  # e.g. "placeholder_ID"
+            res = database.signups.update_one(
+                {"event_id": eid, "user_id": user["_id"]},
+                {"$setOnInsert": {"status": s.get("status") or "attending", "created_at": _now()}},
+                upsert=True,
+            )
+            if res.upserted_id:
+                copied += 1
+                database.event_seats.update_one({"_id": eid}, {"$inc": {"taken": 1}})
+        database.users.update_one({"_id": user["_id"]}, {"$unset": {"signups": ""}})
+
+    migrations.mark_done(MIGRATION_ID, database, copied=copied)
+    migrations.drop_legacy_indexes(LEGACY_INDEXES, database)
+    return copied
+
+def init_app(app):
+    @app.cli.group("signups")
+    def signups_cli():
+        """Event registration maintenance."""
+
+    @signups_cli.command("migrate")
+    def migrate_cmd():
+        """Move users.signups arrays into the signups collection."""
+        click.echo(f"copied {migrate_embedded()} signups")
+
+    if app.config.get("SIGNUPS_MIGRATE_ON_STARTUP", True) and not migrations.is_done(MIGRATION_ID):
+        migrations.run_in_background(app, "signups", migrate_embedded)
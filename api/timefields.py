@@ -0,0 +1,259 @@
+# backend/api/timefields.py
+"""
+Native BSON datetimes for event timing.
+
+pub_req and events store `start_at` / `end_at` as UTC datetimes (8 bytes,
+compared chronologically) instead of the legacy `start_iso` / `end_iso` '...Z'
+strings. API responses still carry the same '...Z' strings (to_iso), so the
+frontend is unchanged.
+
+Events also carry `week_buckets`: the ids of every week their [start_at, end_at)
+spans, multikey-indexed together with start_at. An overlap query only has one
+usable range bound on (start_at, end_at), so it scans all history before the
+window end; filtering on the window's few buckets first keeps the scan to the
+events that actually touch the window, however much history accumulates.
+
+Existing documents are converted by an online backfill (backfill(), run in a
+background thread at startup and via `flask timefields migrate`). Until it has
+completed, range_filter() also matches the legacy string fields (and skips the
+bucket clause) so nothing disappears from the calendar mid-migration.
+"""
+
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from pymongo import UpdateOne
+
+from .. import db
+from . import migrations
+from .indexes import INDEXES
+
+MIGRATION_ID = "event_datetimes"
+BUCKETS_MIGRATION_ID = "event_week_buckets"
+COLLECTIONS = ("pub_req", "events")
+BATCH_SIZE = 500
+# indexes on the string fields, dropped once the backfill has removed them
+LEGACY_INDEXES = {"pub_req": ("status_start_iso_id", "start_iso_id"), "events": ("start_iso_end_iso",)}
+
+BUCKET_EPOCH = datetime(1970, 1, 5, tzinfo=timezone.utc)  # a Monday; buckets are ISO weeks
+LONG_BUCKET = -1           # events spanning more than MAX_EVENT_BUCKETS weeks
+MAX_EVENT_BUCKETS = 8
+MAX_WINDOW_BUCKETS = 106   # wider windows skip the bucket clause (~2 years)
+
+# -----------------------
+# Conversions
+# -----------------------
+
+def to_iso(dt):
+    """datetime (naive = UTC, as pymongo returns it) → 'YYYY-MM-DDTHH:MM:SSZ'"""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    dt = dt.astimezone(timezone.utc)
+    if dt.microsecond:
+        return dt.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    return dt.isoformat().replace("+00:00", "Z")
+
+def parse_iso(s):
+    """Legacy ISO string (Z or offset, optional fraction) → aware UTC datetime, or None."""
+    if not s or not isinstance(s, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(s.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def doc_time(doc, which: str):
+    """ISO string for doc's 'start' / 'end', from start_at or a not yet migrated start_iso."""
+    dt = doc.get(f"{which}_at")
+    if dt is not None:
+        return to_iso(dt)
+    return to_iso(parse_iso(doc.get(f"{which}_iso")))
+
+def public(doc: dict) -> dict:
+    """Replace start_at/end_at with the start_iso/end_iso strings the API returns."""
+    for which in ("start", "end"):
+        if f"{which}_at" in doc or f"{which}_iso" in doc:
+            doc[f"{which}_iso"] = doc_time(doc, which)
+        doc.pop(f"{which}_at", None)
+    doc.pop("week_buckets", None)
+    return doc
+
+# -----------------------
+# Week buckets
+# -----------------------
+
+def _week(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - BUCKET_EPOCH) // timedelta(weeks=1)
+
+def _weeks(start: datetime, end: datetime) -> range:
+    """Bucket ids covering [start, end); an instant event still gets its own week."""
+    last = end - timedelta(microseconds=1) if end > start else start
+    return range(_week(start), _week(last) + 1)
+
+def week_buckets(start_at, end_at) -> list:
+    """week_buckets value for an event; [] when it has no timing."""
+    if start_at is None or end_at is None:
+        return []
+    weeks = _weeks(start_at, end_at)
+    return list(weeks) if len(weeks) <= MAX_EVENT_BUCKETS else [LONG_BUCKET]
+
+def window_buckets(start: datetime, end: datetime):
+    """Buckets to probe for [start, end), or None when the window is too wide to help."""
+    weeks = _weeks(start, end)
+    if len(weeks) > MAX_WINDOW_BUCKETS:
+        return None
+    return [LONG_BUCKET, *weeks]
+
+# -----------------------
+# Queries
+# -----------------------
+
+def range_filter(start: datetime, end: datetime) -> dict:
+    """Events overlapping [start, end): start_at < end AND end_at > start."""
+    filt = {"start_at": {"$lt": end}, "end_at": {"$gt": start}}
+    if not migrations.is_done(MIGRATION_ID):
+        legacy = {"start_iso": {"$lt": to_iso(end)}, "end_iso": {"$gt": to_iso(start)}}
+        return {"$or": [filt, legacy]}
+    buckets = window_buckets(start, end)
+    if buckets is not None and migrations.is_done(BUCKETS_MIGRATION_ID):
+        filt = {"week_buckets": {"$in": buckets}, **filt}
+    return filt
+
+# -----------------------
+# Backfill
+# -----------------------
+
+def _batches(coll, filt, projection, batch_size):
+    """Matching documents in _id order, one batch per query (resumes after the last _id)."""
+    last_id = None
+    while True:
+        page = dict(filt) if last_id is None else {**filt, "_id": {"$gt": last_id}}
+        docs = list(coll.find(page, projection).sort("_id", 1).limit(batch_size))
+        if not docs:
+            return
+        last_id = docs[-1]["_id"]
+        yield docs
+
+def backfill(database=None, batch_size=BATCH_SIZE) -> dict:
+    """
+    Convert start_iso/end_iso to start_at/end_at in small batches and unset the
+    strings, then drop the string indexes. Batches walk the collection by _id,
+    so each one is an index range rather than a fresh scan. Safe to run while the
+    app serves traffic and to re-run; each update is conditional on the string it
+    converted, so concurrent edits win. Returns {collection: documents converted}.
+    """
+    database = database if database is not None else db
+    converted = {}
+    for name in COLLECTIONS:
+        coll = database[name]
+        n = 0
+        legacy = {"$or": [{"start_iso": {"$exists": True}}, {"end_iso": {"$exists": True}}]}
+        for docs in _batches(coll, legacy, {"start_iso": 1, "end_iso": 1}, batch_size):
+            ops = []
+            for d in docs:
+                ops.append(UpdateOne(
+                    {"_id": d["_id"], "start_iso": d.get("start_iso"), "end_iso": d.get("end_iso")},
+                    {"$set": {"start_at": parse_iso(d.get("start_iso")), "end_at": parse_iso(d.get("end_iso"))},
+                     "$unset": {"start_iso": "", "end_iso": ""}},
+                ))
+            n += coll.bulk_write(ops, ordered=False).modified_count
+        converted[name] = n
+    migrations.mark_done(MIGRATION_ID, database, converted=converted)
+    migrations.drop_legacy_indexes(LEGACY_INDEXES, database)
+
+    n = 0
+    untagged = {"week_buckets": {"$exists": False}}
+    for docs in _batches(database.events, untagged, {"start_at": 1, "end_at": 1}, batch_size):
+        n += database.events.bulk_write([UpdateOne(
+            {"_id": d["_id"], "week_buckets": {"$exists": False}},
+            {"$set": {"week_buckets": week_buckets(d.get("start_at"), d.get("end_at"))}},
+        ) for d in docs], ordered=False).modified_count
+    converted["week_buckets"] = n
+    migrations.mark_done(BUCKETS_MIGRATION_ID, database, tagged=n)
+    return converted
+
+# -----------------------
+# Benchmark (scratch database)
+# -----------------------
+
+def bench(sizes, window_days=31, runs=20, per_day=20):
+    """
+    Seed a scratch database with `size` events spread over history (per_day a
+    day, newest ending today) and time the newest window_days window with the
+    plain (start_at, end_at) overlap and with the week-bucket clause.
+    Yields one result dict per (size, strategy).
+    """
+    scratch = db.client[f"{db.name}_bench_calendar"]
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=window_days)
+    strategies = {
+        "overlap": ({"start_at": {"$lt": end}, "end_at": {"$gt": start}}, "start_at_end_at"),
+        "buckets": ({"week_buckets": {"$in": window_buckets(start, end)},
+                     "start_at": {"$lt": end}, "end_at": {"$gt": start}}, "week_buckets_start_at"),
+    }
+    try:
+        for size in sizes:
+            scratch.events.drop()
+            for spec in INDEXES["events"]:
+                scratch.events.create_index(spec["keys"], name=spec["name"], **spec["options"])
+            batch = []
+            for i in range(size):
+                s = end - timedelta(days=i // per_day, hours=(i % per_day) % 12, minutes=7 * (i % per_day))
+                e = s + timedelta(hours=1 + i % 3)
+                batch.append({"start_at": s, "end_at": e, "week_buckets": week_buckets(s, e)})
+                if len(batch) >= 10_000:
+                    scratch.events.insert_many(batch, ordered=False)
+                    batch = []
+            if batch:
+                scratch.events.insert_many(batch, ordered=False)
+
+            for name, (filt, hint) in strategies.items():
+                stats = scratch.events.find(filt).hint(hint).explain().get("executionStats", {})
+                timings = []
+                for _ in range(runs):
+                    t0 = time.perf_counter()
+                    list(scratch.events.find(filt, {"_id": 1}).hint(hint))
+                    timings.append((time.perf_counter() - t0) * 1000)
+                yield {
+                    "size": size,
+                    "strategy": name,
+                    "returned": stats.get("nReturned"),
+                    "keys_examined": stats.get("totalKeysExamined"),
+                    "docs_examined": stats.get("totalDocsExamined"),
+                    "p50_ms": round(statistics.median(timings), 3),
+                }
+    finally:
+        db.client.drop_database(scratch.name)
+
+def init_app(app):
+    @app.cli.group("timefields")
+    def timefields_cli():
+        """Event time storage migration."""
+
+    @timefields_cli.command("migrate")
+    def migrate_cmd():
+        """Convert start_iso/end_iso strings to native datetimes."""
+        click.echo(f"converted {backfill()}")
+
+    @timefields_cli.command("bench")
+    @click.option("--sizes", default="10000,100000,1000000", help="Comma-separated event counts.")
+    @click.option("--window-days", default=31, show_default=True)
+    @click.option("--runs", default=20, show_default=True)
+    def bench_cmd(sizes, window_days, runs):
+        """Calendar window query cost vs. history size (scratch database)."""
+        click.echo(f"{'size':>9} {'strategy':>8} {'returned':>8} {'keys':>9} {'docs':>9} {'p50 ms':>8}")
+        for r in bench([int(x) for x in sizes.split(",") if x.strip()], window_days, runs):
+            click.echo(f"{r['size']:>9} {r['strategy']:>8} {r['returned']!s:>8} "
+                       f"{r['keys_examined']!s:>9} {r['docs_examined']!s:>9} {r['p50_ms']:>8}")
+
+    if app.config.get("TIMEFIELDS_BACKFILL_ON_STARTUP", True) and not migrations.is_done(BUCKETS_MIGRATION_ID):
+        migrations.run_in_background(app, "timefields", backfill)
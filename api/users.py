@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify, session
 from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import csv, io, json
 from .. import db
+from . import ndjson, passwords
 from .auth import normalize_role, hash_password  # reuse helpers
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
@@ -98,6 +101,24 @@ def list_users():
     items = [_doc_to_item(d) for d in cursor]
     return jsonify({"success": True, "items": items, "total": total, "page": page, "page_size": page_size}), 200
 
+def _taken(username=None, email=None, exclude=None):
+    """409 message when username/email already belong to another user (both are unique indexes), else None."""
+    clauses = [{k: v} for k, v in (("email", email), ("username", username)) if v]
+    if not clauses:
+        return None
+    filt = {"$or": clauses}
+    if exclude is not None:
+        filt["_id"] = {"$ne": exclude}
+    other = db.users.find_one(filt, {"email": 1})
+    if other is None:
+        return None
+    return "Email already exists" if email and other.get("email") == email else "Username already exists"
+
+def _duplicate_message(e):
+    """409 message for a DuplicateKeyError on users (a concurrent insert won the race)."""
+    key = (getattr(e, "details", None) or {}).get("keyPattern") or {}
+    return "Email already exists" if "email" in key or "email" in str(e) else "Username already exists"
+
 # ---------------- Create user ----------------
 
 @admin_bp.post("/users")
@@ -117,9 +138,10 @@ def create_user():
     #if allergy not in ALLOWED_ALLERGIES:
      #   return jsonify({"success": False, "message": "Invalid allergy specified"}), 400
 
-    # unique by email
-    if db.users.find_one({"email": email}):
-        return jsonify({"success": False, "message": "Email already exists"}), 409
+    # unique by email and username
+    taken = _taken(username=name, email=email)
+    if taken:
+        return jsonify({"success": False, "message": taken}), 409
 
     # default or explicit initial password
     initial_password = (data.get("password") or "strongpassword123")
@@ -133,18 +155,130 @@ def create_user():
         "allergy": allergy,  # Added allergy part
         "password_hash": hash_password(initial_password),
         "must_change_password": True,
-        "signups": [
-            {
-            "event_id": "placeholder_ID",
-            "status": "attending",
-            }
-        ]
     }
 
-    ins = db.users.insert_one(doc)
+    try:
+        ins = db.users.insert_one(doc)
+    except DuplicateKeyError as e:
+        return jsonify({"success": False, "message": _duplicate_message(e)}), 409
     created = db.users.find_one({"_id": ins.inserted_id})
     return jsonify({"success": True, "item": _doc_to_item(created)}), 201
 
+# ---------------- Bulk import ----------------
+
+IMPORT_BATCH = 500
+IMPORT_FIELDS = ("name", "email", "role", "dept", "active", "allergy", "password")
+
+def _import_rows():
+    """Yield (line_no, dict | None, error) from a CSV (header row) or NDJSON body."""
+    ctype = (request.content_type or "").lower()
+    text = io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline="")
+    if "csv" in ctype:
+        reader = csv.DictReader(text)
+        for csv_row in reader:
+            yield reader.line_num, {k.strip().lower(): v for k, v in csv_row.items() if k}, None
+        return
+    for n, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield n, None, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(obj, dict):
+            yield n, None, "row must be a JSON object"
+            continue
+        yield n, obj, None
+
+def _import_doc(row):
+    """Validate one row → (doc without password_hash, plaintext password) or raise ValueError."""
+    name  = (str(row.get("name") or "")).strip()
+    email = (str(row.get("email") or "")).strip().lower()
+    if not name or not email:
+        raise ValueError("name and email are required")
+    if "@" not in email:
+        raise ValueError("invalid email")
+    active = row.get("active")
+    if isinstance(active, str):
+        active = active.strip().lower() not in {"0", "false", "no", "off"} if active.strip() else True
+    elif active is None:
+        active = True
+    doc = {
+        "username": name,
+        "email": email,
+        "type": _role_to_stored_type(row.get("role") or "staff"),
+        "department": (str(row.get("dept") or "")).strip() or None,
+        "active": bool(active),
+        "allergy": row.get("allergy") or None,
+        "must_change_password": True,
+    }
+    return doc, (row.get("password") or "strongpassword123")
+
+def _insert_batch(batch):
+    """batch: [(row_no, doc)] → result dicts for each row (insert_many, unordered)."""
+    docs = [d for _, d in batch]
+    hashes = passwords.hash_many([d.pop("_password") for d in docs])
+    for d, h in zip(docs, hashes):
+        d["password_hash"] = h
+
+    failed = {}
+    try:
+        db.users.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for err in e.details.get("writeErrors", []):
+            key = ", ".join((err.get("keyValue") or {}).keys())
+            failed[err["index"]] = ("duplicate", f"already exists ({key})" if key else "already exists") if err.get("code") == 11000 \
+                else ("error", err.get("errmsg", "write failed"))
+
+    out = []
+    for i, (row_no, d) in enumerate(batch):
+        if i in failed:
+            status, message = failed[i]
+            out.append({"row": row_no, "status": status, "email": d["email"], "message": message})
+        else:
+            out.append({"row": row_no, "status": "created", "email": d["email"], "id": str(d["_id"])})
+    return out
+
+@admin_bp.post("/users/import")
+def import_users():
+    """
+    Bulk-create users from CSV (Content-Type: text/csv, header row) or NDJSON
+    (one object per line). Columns/keys: name, email, role, dept, active, allergy, password.
+    Streams back NDJSON: one result per row, then a {"summary": {...}} line.
+    Uniqueness is enforced by the users indexes, not by pre-checks. A failure
+    mid-stream ends the body with an {"error": ...} line (see api/ndjson.py).
+    """
+    def generate():
+        counts = {"created": 0, "duplicate": 0, "invalid": 0, "error": 0}
+        batch = []
+
+        def flush():
+            for res in _insert_batch(batch):
+                counts[res["status"]] += 1
+                yield json.dumps(res) + "\n"
+            batch.clear()
+
+        for row_no, row, err in _import_rows():
+            if row is not None and err is None:
+                try:
+                    doc, pw = _import_doc(row)
+                    doc["_password"] = pw
+                    batch.append((row_no, doc))
+                except ValueError as e:
+                    err = str(e)
+            if err:
+                counts["invalid"] += 1
+                yield json.dumps({"row": row_no, "status": "invalid", "message": err}) + "\n"
+            if len(batch) >= IMPORT_BATCH:
+                yield from flush()
+        if batch:
+            yield from flush()
+        yield json.dumps({"summary": counts}) + "\n"
+
+    return ndjson.ndjson_response(generate())
+
 # ---------------- Update user ----------------
 
 @admin_bp.put("/users/<string:user_id>")
@@ -171,7 +305,14 @@ def update_user(user_id):
     except Exception:
         return jsonify({"success": False, "message": "Invalid user id"}), 400
 
-    res = db.users.update_one({"_id": oid}, {"$set": patch})
+    taken = _taken(username=patch.get("username"), email=patch.get("email"), exclude=oid)
+    if taken:
+        return jsonify({"success": False, "message": taken}), 409
+
+    try:
+        res = db.users.update_one({"_id": oid}, {"$set": patch})
+    except DuplicateKeyError as e:
+        return jsonify({"success": False, "message": _duplicate_message(e)}), 409
     if res.matched_count == 0:
         return jsonify({"success": False, "message": "Not found"}), 404
 
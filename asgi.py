@@ -0,0 +1,14 @@
+# backend/asgi.py
+"""
+ASGI entry point for the asyncio serving mode (see api/asyncread.py):
+
+    uvicorn backend.asgi:app --host 0.0.0.0 --port 5000
+
+Public calendar / attachment reads run as coroutines; everything else runs
+the regular Flask app on a thread pool.
+"""
+
+from . import create_app
+from .api.asyncread import create_asgi_app
+
+app = create_asgi_app(create_app())
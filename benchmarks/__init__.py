@@ -0,0 +1,2 @@
+# backend/benchmarks
+"""Benchmark harnesses (run as modules, e.g. `python -m backend.benchmarks.hotpaths`)."""
@@ -0,0 +1,409 @@
+# backend/benchmarks/hotpaths.py
+"""
+Benchmark of the API hot paths.
+
+Builds the app with create_app() against a scratch database on a local mongod
+and redis-server (or, with --inprocess, mongomock + fakeredis), seeds pub_req,
+events and users, then drives each scenario through the WSGI test client from
+--concurrency threads and reports throughput and p50/p90/p99 latency.
+
+    python -m backend.benchmarks.hotpaths --size 10000 --out bench.json
+    python -m backend.benchmarks.hotpaths --size 100000 --baseline bench.json
+    python -m backend.benchmarks.hotpaths --inprocess --size 2000 --requests 200
+
+--inprocess is known to work with mongomock 4.3 + pymongo 4.19 + fakeredis 2.40.
+mongomock 4.3 cannot execute pymongo >= 4.9 UpdateOne ops in bulk_write, so the
+seeding below writes with insert_many only, and its projection code is made safe
+for concurrent requests (see _mongomock_threadsafe_projection).
+
+Results are written as JSON (--out) with the run parameters and git commit so
+runs can be compared; --baseline prints the change against an earlier file.
+The scratch database is dropped afterwards unless --keep is given.
+"""
+
+import argparse
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+SCENARIOS = ("pubreqfetch", "calendar", "login", "register_event", "get_attachment", "pubreqtest_multipart")
+BENCH_PASSWORD = "bench-password"
+DEPARTMENTS = ["Computer Science", "Mathematics", "Biology", "Economics", "Law", "Nursing", "Music", "Physics"]
+ORGANIZATIONS = ["Student Union", "IT Society", "Career Center", "Library", "Sports Club", "Faculty Office"]
+WORDS = ["workshop", "lecture", "seminar", "fika", "hackathon", "career", "fair", "concert",
+         "debate", "research", "open", "day", "guest", "talk", "intro", "python", "data", "ethics"]
+HISTORY_DAYS = 3 * 365
+
+
+def _package():
+    return importlib.import_module(__package__.rpartition(".")[0])
+
+# -----------------------
+# Environment
+# -----------------------
+
+def _mongomock_threadsafe_projection(mongomock):
+    """mongomock pops and restores "_id" on the caller's projection dict, which races
+    when request threads share a module-level projection such as req.LIST_PROJECTION."""
+    collection = mongomock.collection.Collection
+    copy_only_fields = collection._copy_only_fields
+
+    def _copy(self, doc, fields, container):
+        return copy_only_fields(self, doc, dict(fields) if isinstance(fields, dict) else fields, container)
+    collection._copy_only_fields = _copy
+
+def build_app(args):
+    """create_app() bound to the scratch database / redis selected by args."""
+    import pymongo
+    import redis
+
+    pkg = _package()
+    if args.inprocess:
+        try:
+            import fakeredis
+            import mongomock
+            import mongomock.gridfs
+        except ImportError:
+            sys.exit("--inprocess needs `pip install mongomock fakeredis`")
+        mongomock.gridfs.enable_gridfs_integration()
+        _mongomock_threadsafe_projection(mongomock)
+        client = mongomock.MongoClient()
+        session_redis = fakeredis.FakeRedis()
+    else:
+        client = pymongo.MongoClient(args.mongo, event_listeners=[pkg.db_monitor])
+        session_redis = redis.Redis.from_url(args.redis)
+        client.drop_database(args.db)
+
+    # modules bind `from .. import db` on import, so rebind before create_app imports them
+    pkg.mongo = client
+    pkg.db = client[args.db]
+    app = pkg.create_app({
+        "TESTING": True,
+        "DEBUG": False,
+        "SESSION_REDIS": session_redis,
+        "EMAIL_OUTBOX_WORKERS": 0,
+        "MAIL_SUPPRESS_SEND": True,
+        "DB_QUERY_HEADERS": False,
+        "DB_SLOW_MS": float("inf"),
+        # built below, before seeding, instead of on the first request
+        "INDEXES_ENSURE_ON_STARTUP": False,
+    })
+    from ..api.indexes import INDEXES, ensure_indexes
+    if args.inprocess:
+        # mongomock has no $indexStats, so skip the drift check and just build the registry
+        for name, specs in INDEXES.items():
+            for spec in specs:
+                pkg.db[name].create_index(spec["keys"], name=spec["name"], **spec["options"])
+    else:
+        with app.app_context():
+            ensure_indexes(fail_fast=True)
+    session_redis.flushdb()
+    return app, client
+
+# -----------------------
+# Seeding
+# -----------------------
+
+def _title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).capitalize()
+
+def seed(app, size, rng, attachment_kb):
+    """size pub_req, size // 10 events, max(size // 10, 100) users, one attachment."""
+    from ..api import passwords, signups
+    from ..api.req import _build_event_doc, _build_pubreq_doc, fs
+
+    db = _package().db
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat().replace("+00:00", "Z")
+    t0 = time.perf_counter()
+    with app.app_context():
+        batch, approved = [], []
+        for i in range(size):
+            day = now - timedelta(days=rng.randint(-60, HISTORY_DAYS))
+            hour = rng.randint(8, 19)
+            payload = {
+                "title": _title(rng),
+                "author": f"Author {rng.randint(1, 5000)}",
+                "organization": rng.choice(ORGANIZATIONS),
+                "email": f"author{rng.randint(1, 5000)}@example.com",
+                "location": f"Room {rng.randint(1, 40)}",
+                "description": " ".join(rng.choice(WORDS) for _ in range(30)),
+                "date": day.strftime("%Y-%m-%d"),
+                "start_time": f"{hour:02d}:00",
+                "end_time": f"{hour + rng.randint(1, 3):02d}:00",
+                "max_attendees": rng.choice([None, 20, 50, 200]),
+                "departments": rng.sample(DEPARTMENTS, rng.randint(1, 3)),
+            }
+            doc, _err, _code = _build_pubreq_doc(payload, [], now_iso)
+            doc["status"] = rng.choices(["pending", "approved", "rejected"], [3, 6, 1])[0]
+            doc["is_visible"] = doc["status"] == "approved"
+            batch.append(doc)
+            if len(batch) >= 5000:
+                db.pub_req.insert_many(batch, ordered=False)
+                approved += [d for d in batch if d["status"] == "approved"]
+                batch = []
+        if batch:
+            db.pub_req.insert_many(batch, ordered=False)
+            approved += [d for d in batch if d["status"] == "approved"]
+
+        events = []
+        for src in approved[: max(size // 10, 1)]:
+            doc, _err, _code = _build_event_doc(src, [], now_iso)
+            doc["source_request_id"] = src["_id"]
+            events.append(doc)
+        for i in range(0, len(events), 5000):
+            db.events.insert_many(events[i:i + 5000], ordered=False)
+        # fresh database: insert the seat counters instead of the ensure_counters() upserts
+        seats = [{"_id": e["_id"], "taken": 0, "capacity": signups._capacity(e)} for e in events]
+        for i in range(0, len(seats), 5000):
+            db.event_seats.insert_many(seats[i:i + 5000], ordered=False)
+
+        password_hash = passwords.hash_password(BENCH_PASSWORD)   # one bcrypt, reused
+        users = [{
+            "email": f"bench{i}@example.com",
+            "password_hash": password_hash,
+            "username": f"bench{i}",
+            "type": "student",
+            "active": True,
+            "must_change_password": False,
+        } for i in range(max(size // 10, 100))]
+        for i in range(0, len(users), 5000):
+            db.users.insert_many(users[i:i + 5000], ordered=False)
+
+        blob = rng.randbytes(attachment_kb * 1024)
+        file_id = fs.put(blob, filename="bench.bin", content_type="application/octet-stream")
+
+    return {
+        "pub_req": size,
+        "events": len(events),
+        "users": len(users),
+        "attachment_bytes": len(blob),
+        "seconds": round(time.perf_counter() - t0, 2),
+        "event_ids": [str(e["_id"]) for e in events],
+        "user_ids": [str(u["_id"]) for u in users],
+        "file_id": str(file_id),
+    }
+
+# -----------------------
+# Scenarios
+# -----------------------
+
+def _session(client, **values):
+    with client.session_transaction() as sess:
+        sess.update(values)
+
+def make_scenarios(seeded, upload_kb):
+    """name -> (prepare(client, worker, rng), request(client, rng) -> response)"""
+    today = datetime.now(timezone.utc).date()
+    upload = b"x" * (upload_kb * 1024)
+
+    def staff(client, worker, rng):
+        _session(client, user_id=seeded["user_ids"][0], role="staff", type="staff")
+
+    def student(client, worker, rng):
+        uid = seeded["user_ids"][worker % len(seeded["user_ids"])]
+        _session(client, user_id=uid, role="student", type="student")
+
+    def anonymous(client, worker, rng):
+        pass
+
+    def pubreqfetch(client, rng):
+        params = rng.choice([
+            "cursor=&page_size=50",
+            "cursor=&page_size=50&status=pending",
+            f"cursor=&page_size=50&dept={rng.choice(DEPARTMENTS)}",
+            f"page_size=50&q={rng.choice(WORDS)}",
+            "page_size=50&facets=1&status=approved",
+        ])
+        return client.get(f"/api/req/pubreqfetch?{params}")
+
+    def calendar(client, rng):
+        start = today - timedelta(days=rng.randint(0, HISTORY_DAYS // 30) * 30)
+        return client.get(f"/api/req/calendar?start={start}&end={start + timedelta(days=31)}")
+
+    def login(client, rng):
+        n = rng.randrange(len(seeded["user_ids"]))
+        return client.post("/api/auth/login", json={"username": f"bench{n}", "password": BENCH_PASSWORD})
+
+    def register_event(client, rng):
+        return client.post("/api/auth/register_event", json={"event_id": rng.choice(seeded["event_ids"])})
+
+    def get_attachment(client, rng):
+        rv = client.get(f"/api/req/attachments/{seeded['file_id']}")
+        rv.get_data()   # drain the streamed body
+        return rv
+
+    def pubreqtest_multipart(client, rng):
+        return client.post("/api/req/pubreqtest", content_type="multipart/form-data", data={
+            "title": _title(rng),
+            "author": "Bench",
+            "email": "bench@example.com",
+            "date": str(today + timedelta(days=rng.randint(1, 60))),
+            "start_time": "10:00",
+            "end_time": "11:00",
+            "departments": json.dumps(rng.sample(DEPARTMENTS, 2)),
+            "attachments": (io.BytesIO(upload), "poster.pdf", "application/pdf"),
+        })
+
+    return {
+        "pubreqfetch": (staff, pubreqfetch),
+        "calendar": (anonymous, calendar),
+        "login": (anonymous, login),
+        "register_event": (student, register_event),
+        "get_attachment": (anonymous, get_attachment),
+        "pubreqtest_multipart": (anonymous, pubreqtest_multipart),
+    }
+
+# -----------------------
+# Runner
+# -----------------------
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+def run_scenario(app, prepare, call, requests, concurrency, warmup, seed_value):
+    """Run `requests` calls split over `concurrency` threads; returns the stats dict."""
+    latencies, statuses, lock = [], {}, threading.Lock()
+    per_worker = [requests // concurrency + (1 if w < requests % concurrency else 0) for w in range(concurrency)]
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(w):
+        rng = random.Random(seed_value * 1000 + w)
+        client = app.test_client()
+        prepare(client, w, rng)
+        for _ in range(warmup):
+            call(client, rng)
+        mine, codes = [], {}
+        barrier.wait()
+        for _ in range(per_worker[w]):
+            t0 = time.perf_counter()
+            rv = call(client, rng)
+            mine.append(time.perf_counter() - t0)
+            codes[rv.status_code] = codes.get(rv.status_code, 0) + 1
+        with lock:
+            latencies.extend(mine)
+            for code, n in codes.items():
+                statuses[code] = statuses.get(code, 0) + n
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(_percentile(latencies, 0.50)),
+        "p90_ms": ms(_percentile(latencies, 0.90)),
+        "p99_ms": ms(_percentile(latencies, 0.99)),
+        "mean_ms": ms(statistics.fmean(latencies)) if latencies else None,
+        "max_ms": ms(latencies[-1]) if latencies else None,
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+        "errors": sum(n for code, n in statuses.items() if code >= 500),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except Exception:
+        return None
+
+def _print_table(results, baseline):
+    base = {r["scenario"]: r for r in (baseline or {}).get("results", [])}
+    print(f"{'scenario':<22} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'5xx':>5}  vs baseline")
+    for r in results:
+        line = f"{r['scenario']:<22} {r['throughput_rps']!s:>9} {r['p50_ms']!s:>9} {r['p99_ms']!s:>9} {r['errors']:>5}"
+        b = base.get(r["scenario"])
+        if b and b.get("p50_ms") and b.get("p99_ms") and b.get("throughput_rps"):
+            line += "  rps {:+.0%} p50 {:+.0%} p99 {:+.0%}".format(
+                r["throughput_rps"] / b["throughput_rps"] - 1,
+                r["p50_ms"] / b["p50_ms"] - 1,
+                r["p99_ms"] / b["p99_ms"] - 1,
+            )
+        print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--redis", default="redis://localhost:6379/15")
+    parser.add_argument("--db", default="bench_hotpaths", help="scratch database (dropped first)")
+    parser.add_argument("--inprocess", action="store_true", help="mongomock + fakeredis instead of servers")
+    parser.add_argument("--size", type=int, default=10_000, help="pub_req documents (events, users = size / 10)")
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per thread")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--attachment-kb", type=int, default=1024)
+    parser.add_argument("--upload-kb", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write JSON results here")
+    parser.add_argument("--baseline", help="earlier --out file to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    app, client = build_app(args)
+    try:
+        rng = random.Random(args.seed)
+        seeded = seed(app, args.size, rng, args.attachment_kb)
+        print(f"seeded {seeded['pub_req']} pub_req, {seeded['events']} events, "
+              f"{seeded['users']} users in {seeded['seconds']}s")
+
+        scenarios = make_scenarios(seeded, args.upload_kb)
+        results = []
+        for i, name in enumerate(names):
+            prepare, call = scenarios[name]
+            stats = run_scenario(app, prepare, call, args.requests, args.concurrency, args.warmup, args.seed + i)
+            results.append({"scenario": name, **stats})
+
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "inprocess" if args.inprocess else "servers",
+            "params": {k: getattr(args, k) for k in (
+                "size", "requests", "concurrency", "warmup", "attachment_kb", "upload_kb", "seed")},
+            "seeded": {k: v for k, v in seeded.items() if not k.endswith("_ids") and k != "file_id"},
+            "results": results,
+        }
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        _print_table(results, baseline)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"wrote {args.out}")
+    finally:
+        if not args.inprocess and not args.keep:
+            client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
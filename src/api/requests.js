@@ -49,6 +49,8 @@ async function list(params = {}) {
   if (params.q) q.set("q", params.q);
   if (params.page) q.set("page", String(params.page));
   if (params.page_size) q.set("page_size", String(params.page_size));
+  if (params.cursor != null) q.set("cursor", params.cursor); // keyset paging: "" = first page
+  if (params.facets) q.set("facets", "1"); // adds total + facets.status / facets.departments tab counts
 
   const res = await fetch(`${API}/req/pubreqfetch?${q.toString()}`, {
     credentials: "include",